@@ -0,0 +1,125 @@
+######################################################
+# File: batch.py                                     #
+# Author: Dan McFalls (dmcfalls@stanford.edu)        #
+# Project: Fitch Proof Automation with State-Search  #
+# Final Project for CS221: Artificial Intelligence   #
+######################################################
+
+# Proves many problems at once, spread across a pool of worker processes.
+#
+# Usage: python batch.py problems.jsonl [-o results.jsonl] [--workers N] [--timeout SECONDS]
+#                        [--max-nodes N] [--max-frontier N] [--engine ucs|astar|fast|ida|plan|refute]
+#                        [--cache PATH] [--stats] [--costs PROFILE.json]
+#
+# Each input line is a JSON object with a "goal" and optionally "premises" (either a string in the
+# "* p * p => q" format main.py uses, or a list of sentences) and an "id". Each output line is a JSON
+# record with the id, status ("proved", "invalid", "timeout", "exhausted" or "error"), proof, node
+# count and runtime, plus per-rule search statistics with --stats. Records are written as soon as
+# they finish, so they may be out of input order. Every proof is checked (checker.py) before it's
+# written; one that doesn't check out gets status "rejected" and the reason as its error.
+
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+
+import checker
+import fitch
+import proofcache
+import stats
+
+# Each worker process opens its own connection to the proof cache, on first use.
+_caches = {}
+
+def openCache(path):
+    if path is None:
+        return None
+    if path not in _caches:
+        _caches[path] = proofcache.ProofCache(path)
+    return _caches[path]
+
+# Returns the premises of a problem record in the "* p * q" format fitch.parseProblem expects.
+def formatPremises(premises):
+    if premises is None or isinstance(premises, basestring):
+        return premises
+    if len(premises) == 0:
+        return None
+    return " ".join("* " + premise for premise in premises)
+
+# Proves a single problem record; runs in a worker process.
+# @param task = (problem record, options dict)
+def proveRecord(task):
+    problem, options = task
+    startTime = time.time()
+    try:
+        result = fitch.findFitchProof(formatPremises(problem.get("premises")), problem["goal"],
+                                      engine = options["engine"], maxNodes = options["maxNodes"],
+                                      timeLimit = options["timeLimit"], cache = openCache(options["cache"]),
+                                      stats = stats.SearchStats() if options["stats"] else None,
+                                      maxFrontier = options["maxFrontier"], costs = options["costs"])
+        record = checker.verifyResult(result).toDict()
+    except Exception as error:
+        record = {"status": "error", "error": "%s: %s" % (type(error).__name__, error),
+                  "runtime": time.time() - startTime}
+    record["id"] = problem.get("id")
+    return record
+
+# Reads problem records from a JSON-lines file, numbering any that have no id.
+def readProblems(path):
+    problems = []
+    with open(path) as problemFile:
+        for lineNumber, line in enumerate(problemFile, 1):
+            if not line.strip():
+                continue
+            problem = json.loads(line)
+            problem.setdefault("id", lineNumber)
+            problems.append(problem)
+    return problems
+
+# Proves every problem on a pool of processes, calling report(record) as each one finishes.
+# @param costs = the fitch.CostProfile to search with (None for fitch.DEFAULT_COSTS)
+def proveAll(problems, report, workers = None, engine = "ucs", maxNodes = None, timeLimit = None, cachePath = None,
+             collectStats = False, maxFrontier = None, costs = None):
+    options = {"engine": engine, "maxNodes": maxNodes, "timeLimit": timeLimit, "cache": cachePath,
+               "stats": collectStats, "maxFrontier": maxFrontier, "costs": costs}
+    pool = multiprocessing.Pool(workers)
+    try:
+        for record in pool.imap_unordered(proveRecord, [(problem, options) for problem in problems]):
+            report(record)
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+def main():
+    parser = argparse.ArgumentParser(description = "Prove a JSON-lines file of Fitch problems in parallel.")
+    parser.add_argument("problems", help = "JSON-lines file of {\"premises\", \"goal\", \"id\"} records")
+    parser.add_argument("-o", "--output", help = "file to write results to (default: standard output)")
+    parser.add_argument("--workers", type = int, default = None, help = "worker processes (default: one per core)")
+    parser.add_argument("--timeout", type = float, default = None, help = "wall-clock seconds allowed per problem")
+    parser.add_argument("--max-nodes", type = int, default = None, help = "states each search may expand")
+    parser.add_argument("--max-frontier", type = int, default = None,
+                        help = "states a search may hold before it switches to iterative deepening")
+    parser.add_argument("--engine", default = "ucs", choices = ["ucs"] + sorted(fitch.ENGINES.keys()))
+    parser.add_argument("--cache", default = None, help = "sqlite file of previously found proofs to reuse and extend")
+    parser.add_argument("--stats", action = "store_true", help = "include per-rule search statistics in each record")
+    parser.add_argument("--costs", default = None, help = "JSON file of rule costs to search with, as tuning.py writes")
+    args = parser.parse_args()
+    costs = fitch.loadCostProfile(args.costs) if args.costs else None
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    def report(record):
+        output.write(json.dumps(record) + "\n")
+        output.flush()
+    try:
+        proveAll(readProblems(args.problems), report, args.workers, args.engine, args.max_nodes, args.timeout,
+                 args.cache, args.stats, args.max_frontier, costs)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+######################################################
+# File: benchmark.py                                 #
+# Author: Dan McFalls (dmcfalls@stanford.edu)        #
+# Project: Fitch Proof Automation with State-Search  #
+# Final Project for CS221: Artificial Intelligence   #
+######################################################
+
+# Benchmarks the solver on the exercises from main.py and compares runs against a saved baseline.
+#
+# Usage: python benchmark.py [-o results.json] [--baseline baseline.json] [--threshold 0.2]
+#                            [--engine ucs|astar|fast|ida|plan|refute] [--max-nodes N] [--timeout SECONDS]
+#                            [--only NAME ...]
+#
+# Every problem runs in a fresh process with the same node and time budgets, and the run records its
+# status, wall time, nodes expanded, peak memory (resident set size, in kilobytes) and proof length.
+# With --baseline, any problem that got slower, expanded more nodes, used more memory or found a
+# longer proof by more than the threshold (a fraction), or stopped being proved, is reported as a
+# regression, and the exit status is 1. The baseline must have been run with the same engine and
+# budgets; if it wasn't, nothing runs and the exit status is 2.
+
+import argparse
+import json
+import multiprocessing
+import resource
+import sys
+import time
+
+import fitch
+
+# (name, premises, goal, stretch). Stretch problems are the exercises main.py leaves commented out
+# as too hard; they run under the same budgets, and aren't expected to be proved.
+PROBLEMS = [
+    ("4.1", "* p * q * p AND q => r", "r", False),
+    ("4.2", "* p AND q", "q OR r", False),
+    ("4.3", "* p => q * q <=> r", "p => r", False),
+    ("4.4-prelude-1", "* p => r * q => r * p OR q", "r", False),
+    ("4.4-prelude-2", "* p => q * m => p OR q * q => q", "m => q", False),
+    ("4.4-prelude-3", "* p => q * m => p OR q", "q => q", False),
+    ("4.4", "* p => q * m => p OR q", "m => q", False),
+    ("4.5", "* p => q => r", "( p => q ) => p => r", False),
+    ("4.6", None, "p => q => p", False),
+    ("4.7", None, "( p => q => r ) => ( p => q ) => p => r", True),
+    ("4.8", None, "( ~p => q ) => ( ~p => ~q ) => p", False),
+    ("4.9", "* p", "NOT NOT p", False),
+    ("4.10", "* p => q", "NOT q => NOT p", False),
+    ("4.11", "* p => q", "NOT p OR q", True),
+    ("4.12", None, "((p => q) => p) => q", True),     # As written in main.py, which isn't a tautology
+    ("4.13", "* NOT ( p OR q )", "NOT p AND NOT q", True),
+    ("4.14", None, "p OR NOT p", True),
+    ("reiteration", "* p", "p", False),
+    ("implication-elimination", "* p => q * p", "q", False),
+    ("implication-introduction", "* p * q", "p => q", False),
+    ("and-introduction-elimination", "* p * p => q * ( p AND q ) => r", "r", False),
+    ("and-introduction", "* p * p => q", "p AND q", False),
+    ("nested-implication-introduction", None, "p => q => p => p", False),
+    ("negation-introduction", "* p => q * p => ~q", "~p", False),
+    ("contradiction-negation", "* q * NOT q", "NOT p", False),
+    ("contradiction", "* q * NOT q", "p", False),
+]
+
+# Measurements compared against the baseline, and the smallest increase in each that counts (so
+# that timer noise on problems solved in milliseconds isn't reported).
+METRICS = [("runtime", 0.05), ("nodes", 10), ("peakMemoryKB", 1024), ("proofLength", 1)]
+
+# Runs one problem; runs in its own worker process, so that peak memory is the problem's own.
+# @param task = (problem, options dict)
+def runProblem(task):
+    (name, premises, goal, stretch), options = task
+    result = fitch.findFitchProof(premises, goal, options["engine"], maxNodes = options["maxNodes"],
+                                  timeLimit = options["timeLimit"])
+    return {
+        "name": name,
+        "stretch": stretch,
+        "status": result.status,
+        "runtime": result.runtime,
+        "nodes": result.nodes,
+        "peakMemoryKB": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "proofLength": len(result.actions) if result.actions is not None else None,
+    }
+
+# Runs the problems one at a time, each in a fresh process, and returns the benchmark record.
+def runBenchmark(problems, engine = "ucs", maxNodes = 100000, timeLimit = 60, report = None):
+    options = {"engine": engine, "maxNodes": maxNodes, "timeLimit": timeLimit}
+    pool = multiprocessing.Pool(1, maxtasksperchild = 1)
+    results = []
+    try:
+        for record in pool.imap(runProblem, [(problem, options) for problem in problems]):
+            results.append(record)
+            if report is not None:
+                report(record)
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    return {"engine": engine, "maxNodes": maxNodes, "timeLimit": timeLimit, "date": time.time(), "results": results}
+
+# Settings of a run that must match the baseline's for their measurements to be comparable.
+RUN_SETTINGS = ["engine", "maxNodes", "timeLimit"]
+
+# Returns a list of messages describing each setting that differs between a run and a baseline run.
+def settingDifferences(run, baseline):
+    return ["%s is %s, but the baseline used %s" % (setting, run.get(setting), baseline.get(setting))
+            for setting in RUN_SETTINGS if run.get(setting) != baseline.get(setting)]
+
+# Returns a list of messages describing each regression of a benchmark run against a baseline run.
+# Raises ValueError if the runs used different settings (see settingDifferences).
+# @param threshold = relative increase in a measurement (e.g. 0.2 for 20%) that counts as a regression
+def compareRuns(run, baseline, threshold = 0.2):
+    differences = settingDifferences(run, baseline)
+    if differences:
+        raise ValueError("Can't compare against the baseline: " + "; ".join(differences))
+    regressions = []
+    previous = dict((record["name"], record) for record in baseline["results"])
+    for record in run["results"]:
+        old = previous.get(record["name"])
+        if old is None:
+            continue
+        if old["status"] == "proved" and record["status"] != "proved":
+            regressions.append("%s: no longer proved (%s)" % (record["name"], record["status"]))
+            continue
+        if record["status"] != "proved" or old["status"] != "proved":
+            # Runs that hit their budget stop at the budget, so only proofs are compared
+            continue
+        for metric, minimumIncrease in METRICS:
+            before, after = old.get(metric), record.get(metric)
+            if before is None or after is None:
+                continue
+            if after - before >= minimumIncrease and after > before * (1 + threshold):
+                regressions.append("%s: %s went from %s to %s" % (record["name"], metric, before, after))
+    return regressions
+
+def formatRecord(record):
+    return "%-32s %-9s %8.2fs %8d nodes %8d KB  length %s%s" % (
+        record["name"], record["status"], record["runtime"], record["nodes"], record["peakMemoryKB"],
+        record["proofLength"], "  (stretch)" if record["stretch"] else "")
+
+def main():
+    parser = argparse.ArgumentParser(description = "Benchmark the solver on the exercises from main.py.")
+    parser.add_argument("-o", "--output", help = "file to save the run to, as JSON")
+    parser.add_argument("--baseline", help = "saved run to compare against")
+    parser.add_argument("--threshold", type = float, default = 0.2, help = "relative increase counted as a regression")
+    parser.add_argument("--engine", default = "ucs", choices = ["ucs"] + sorted(fitch.ENGINES.keys()))
+    parser.add_argument("--max-nodes", type = int, default = 100000, help = "states each search may expand")
+    parser.add_argument("--timeout", type = float, default = 60, help = "wall-clock seconds allowed per problem")
+    parser.add_argument("--only", nargs = "+", metavar = "NAME", help = "run only the named problems")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as baselineFile:
+            baseline = json.load(baselineFile)
+        settings = {"engine": args.engine, "maxNodes": args.max_nodes, "timeLimit": args.timeout}
+        differences = settingDifferences(settings, baseline)
+        if differences:
+            parser.error("can't compare against %s: %s" % (args.baseline, "; ".join(differences)))
+
+    problems = PROBLEMS
+    if args.only:
+        problems = [problem for problem in PROBLEMS if problem[0] in args.only]
+    def report(record):
+        print formatRecord(record)
+        sys.stdout.flush()
+    run = runBenchmark(problems, args.engine, args.max_nodes, args.timeout, report)
+
+    if args.output:
+        with open(args.output, "w") as outputFile:
+            json.dump(run, outputFile, indent = 2, sort_keys = True)
+    if baseline is not None:
+        regressions = compareRuns(run, baseline, args.threshold)
+        for regression in regressions:
+            print "REGRESSION " + regression
+        if regressions:
+            sys.exit(1)
+        print "No regressions against %s" % args.baseline
+
+if __name__ == "__main__":
+    main()
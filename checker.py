@@ -0,0 +1,270 @@
+######################################################
+# File: checker.py                                   #
+# Author: Dan McFalls (dmcfalls@stanford.edu)        #
+# Project: Fitch Proof Automation with State-Search  #
+# Final Project for CS221: Artificial Intelligence   #
+######################################################
+
+# Checks Fitch proofs, independently of the searches that write them.
+#
+# A proof is a list of (sentence, justification, depth) lines, as fitch.ProofState and
+# fitch.ProofResult hold them. Each line is checked against the sentences in scope when it's written:
+# the premises, the lines of every subproof still open, and the conclusions of the subproofs closed
+# inside those. The lines don't say which earlier lines a rule used, so the checker keeps the scope
+# indexed by what each rule looks for (the conjuncts of conjunctions in scope, the antecedents of
+# each consequent, ...), and finds them in a few dictionary lookups. Each entry of the indices is
+# tagged with the subproof it was added in, so closing a subproof only marks it closed, and a proof
+# is checked in time linear in its length.
+#
+# The rules are those the search uses (fitch.RULE_NAMES):
+#   * A:  opens a subproof one level deeper, assuming any sentence
+#   * R:  any sentence in scope
+#   * AI: phi && psi from phi and psi (conjunctions are flat, so p && q && r comes from p && q and r)
+#   * AE: any conjunct of a conjunction in scope
+#   * OI: phi || psi from phi or psi (likewise flat, so p || q || r also comes from p || q)
+#   * OE: psi from phi_1 || ... || phi_n and phi_i -> psi for every i
+#   * II: phi -> psi from a closed subproof in scope that assumed phi and has psi as a line; either as
+#         the line that closes it, or any time later while the level it was opened from is open
+#   * IE: psi from phi -> psi and phi
+#   * NI: ~phi from phi -> psi and phi -> ~psi
+#   * NE: phi from ~~phi
+#   * BI: phi <-> psi from phi -> psi and psi -> phi
+#   * BE: phi -> psi or psi -> phi from phi <-> psi
+# A line at one level less than the one before it closes the innermost subproof. Premise lines may
+# only come first.
+
+import formula
+
+# Raised when a proof breaks a rule.
+class InvalidProof(Exception):
+    # @param lineNumber = position of the offending line (from 1), or None if the proof as a whole is wrong
+    def __init__(self, message, lineNumber = None):
+        if lineNumber is not None:
+            message = "line %d: %s" % (lineNumber, message)
+        Exception.__init__(self, message)
+        self.lineNumber = lineNumber
+
+# Records that a key is in scope from the subproof numbered frame on, unless it already is from a
+# subproof that's still open (and so lasts at least as long).
+def _mark(table, key, frame, alive):
+    old = table.get(key)
+    if old is None or not alive[old]:
+        table[key] = frame
+
+# Returns True if a key is in scope.
+def _has(table, key, alive):
+    frame = table.get(key)
+    return frame is not None and alive[frame]
+
+# The sentences in scope at some point of a proof, indexed for each rule. Each index maps what it
+# holds to the number of the subproof it was added in (0 for the premises' level), and an entry is
+# in scope as long as that subproof is open. Formulas are interned, so the indices are keyed by
+# Formula.id, which hashes faster than the formulas themselves.
+class _Scope(object):
+    def __init__(self):
+        self.alive = [True]                 # subproof number -> whether it's still open
+        self.frames = [(0, None, [])]       # open subproofs, outermost first: (number, assumption, ids of its lines)
+        self.sentences = {}
+        self.conjuncts = {}                 # children of conjunctions
+        self.conjunctions = {}              # conjunctions, by the tuple of their children
+        self.disjunctions = {}              # likewise for disjunctions
+        self.disjunctionsOf = {}            # phi -> {children of each disjunction with phi as a disjunct}
+        self.antecedents = {}               # psi -> {phi} for each phi -> psi
+        self.consequents = {}               # phi -> {psi} for each phi -> psi
+        self.negatedConsequents = {}        # phi -> {psi} for each phi -> ~psi
+        self.biconditionals = {}            # (phi, psi) for each phi <-> psi or psi <-> phi
+        self.doubleNegations = {}           # phi for each ~~phi
+        self.subproofs = {}                 # (phi, psi) for each closed subproof assuming phi, with line psi
+
+    def depth(self):
+        return len(self.frames) - 1
+
+    # Adds a sentence to the innermost subproof.
+    def add(self, sentence):
+        frame, _, lines = self.frames[-1]
+        alive = self.alive
+        key = sentence.id
+        lines.append(key)
+        _mark(self.sentences, key, frame, alive)
+        op = sentence.op
+        if op == formula.ATOM:
+            return
+        children = sentence.children
+        if op == formula.IMPLIES:
+            phi, psi = children
+            _mark(self.antecedents.setdefault(psi.id, {}), phi.id, frame, alive)
+            _mark(self.consequents.setdefault(phi.id, {}), psi.id, frame, alive)
+            if psi.op == formula.NOT:
+                _mark(self.negatedConsequents.setdefault(phi.id, {}), psi.children[0].id, frame, alive)
+        elif op == formula.AND:
+            for child in children:
+                _mark(self.conjuncts, child.id, frame, alive)
+            _mark(self.conjunctions, tuple([child.id for child in children]), frame, alive)
+        elif op == formula.OR:
+            ids = tuple([child.id for child in children])
+            _mark(self.disjunctions, ids, frame, alive)
+            for child in ids:
+                _mark(self.disjunctionsOf.setdefault(child, {}), ids, frame, alive)
+        elif op == formula.IFF:
+            phi, psi = children
+            _mark(self.biconditionals, (phi.id, psi.id), frame, alive)
+            _mark(self.biconditionals, (psi.id, phi.id), frame, alive)
+        elif children[0].op == formula.NOT:
+            _mark(self.doubleNegations, children[0].children[0].id, frame, alive)
+
+    # Opens a subproof assuming the sentence.
+    def open(self, assumption):
+        frame = len(self.alive)
+        self.alive.append(True)
+        self.frames.append((frame, assumption, []))
+        self.add(assumption)
+
+    # Closes the innermost subproof: its lines leave the scope, and the subproof enters the scope
+    # of the one around it, for Implication Introduction.
+    def close(self):
+        frame, assumption, lines = self.frames.pop()
+        alive = self.alive
+        alive[frame] = False
+        outer = self.frames[-1][0]
+        phi = assumption.id
+        for psi in lines:
+            _mark(self.subproofs, (phi, psi), outer, alive)
+
+    # Returns True if a conjunction or disjunction (table) of the children with the given ids is in
+    # scope, or the single child if there's one.
+    def hasJunction(self, table, ids):
+        if len(ids) == 1:
+            return _has(self.sentences, ids[0], self.alive)
+        return _has(table, ids, self.alive)
+
+    # Returns True if the rule justifies the sentence from the current scope.
+    def justifies(self, sentence, justification):
+        alive = self.alive
+        key = sentence.id
+        children = sentence.children
+        if justification == "R":
+            return _has(self.sentences, key, alive)
+        if justification == "IE":
+            for phi, frame in self.antecedents.get(key, {}).iteritems():
+                if alive[frame] and _has(self.sentences, phi, alive):
+                    return True
+            return False
+        if justification == "AE":
+            return _has(self.conjuncts, key, alive)
+        if justification == "II":
+            return sentence.op == formula.IMPLIES and _has(self.subproofs, (children[0].id, children[1].id), alive)
+        if justification == "AI":
+            if sentence.op != formula.AND:
+                return False
+            ids = tuple([child.id for child in children])
+            for split in range(1, len(ids)):
+                if (self.hasJunction(self.conjunctions, ids[:split])
+                        and self.hasJunction(self.conjunctions, ids[split:])):
+                    return True
+            return False
+        if justification == "OI":
+            if sentence.op != formula.OR:
+                return False
+            ids = tuple([child.id for child in children])
+            for child in ids:
+                if _has(self.sentences, child, alive):
+                    return True
+            for split in range(2, len(ids)):
+                if (self.hasJunction(self.disjunctions, ids[:split])
+                        or self.hasJunction(self.disjunctions, ids[len(ids) - split:])):
+                    return True
+            return False
+        if justification == "OE":
+            antecedents = self.antecedents.get(key, {})
+            for phi, frame in antecedents.iteritems():
+                if not alive[frame]:
+                    continue
+                for disjuncts, frame in self.disjunctionsOf.get(phi, {}).iteritems():
+                    if alive[frame] and all(_has(antecedents, disjunct, alive) for disjunct in disjuncts):
+                        return True
+            return False
+        if justification == "NI":
+            if sentence.op != formula.NOT:
+                return False
+            phi = children[0].id
+            consequents = self.consequents.get(phi, {})
+            for psi, frame in self.negatedConsequents.get(phi, {}).iteritems():
+                if alive[frame] and _has(consequents, psi, alive):
+                    return True
+            return False
+        if justification == "NE":
+            return _has(self.doubleNegations, key, alive)
+        if justification == "BI":
+            if sentence.op != formula.IFF:
+                return False
+            phi, psi = children[0].id, children[1].id
+            return _has(self.antecedents.get(psi, {}), phi, alive) and _has(self.antecedents.get(phi, {}), psi, alive)
+        if justification == "BE":
+            return sentence.op == formula.IMPLIES and _has(self.biconditionals, (children[0].id, children[1].id), alive)
+        raise ValueError("Unknown justification: %s" % justification)
+
+# Checks a proof of a goal from premises, and raises InvalidProof at the first line that doesn't
+# follow, or if the proof doesn't end with the goal outside every subproof.
+# @param premises = list of premise Formulas
+# @param goal = the Formula the proof must end with, or None to check the lines alone
+# @param lines = the (sentence, justification, depth) lines after the premises; lines justified
+#   "Premise" (as in a ProofState's lines) may come first, and must be among the premises
+def checkProof(premises, goal, lines):
+    scope = _Scope()
+    for premise in premises:
+        scope.add(premise)
+    premiseSet = frozenset(premises)
+    premisesDone = False
+    for lineNumber, (sentence, justification, depth) in enumerate(lines, 1):
+        if justification == "Premise":
+            if premisesDone or depth != 0:
+                raise InvalidProof("premises must come first, outside every subproof", lineNumber)
+            if sentence not in premiseSet:
+                raise InvalidProof("%s is not a premise" % sentence, lineNumber)
+            continue
+        premisesDone = True
+
+        current = scope.depth()
+        if justification == "A":
+            if depth != current + 1:
+                raise InvalidProof("an assumption at depth %d can't follow a line at depth %d" % (depth, current),
+                                   lineNumber)
+            scope.open(sentence)
+            continue
+        if depth == current - 1 and current > 0:
+            scope.close()
+        elif depth != current:
+            raise InvalidProof("a line at depth %d can't follow a line at depth %d" % (depth, current), lineNumber)
+        try:
+            justified = scope.justifies(sentence, justification)
+        except ValueError as error:
+            raise InvalidProof(str(error), lineNumber)
+        if not justified:
+            raise InvalidProof("%s doesn't follow by %s from the sentences in scope" % (sentence, justification),
+                               lineNumber)
+        scope.add(sentence)
+
+    if goal is not None:
+        if not lines or lines[-1][0] != goal or lines[-1][1] == "Premise" or lines[-1][2] != 0:
+            raise InvalidProof("the proof must end with %s outside every subproof" % goal)
+
+# Returns True if the proof passes checkProof.
+def isValidProof(premises, goal, lines):
+    try:
+        checkProof(premises, goal, lines)
+    except InvalidProof:
+        return False
+    return True
+
+# Checks the proof of a fitch.ProofResult that was proved, and if it's wrong, changes the result's
+# status to "rejected", with the reason as its error. For proofs that come from outside the search
+# that's checking them, like a cache or another process.
+# @return the result
+def verifyResult(result):
+    if result.status == "proved" and result.lines is not None:
+        try:
+            checkProof(result.premises, result.goal, result.lines)
+        except InvalidProof as error:
+            result.status = "rejected"
+            result.error = "Invalid proof: %s" % error
+    return result
@@ -6,594 +6,1193 @@
 ######################################################
 
 import util
-import random
-
-########################
-#   Helper Functions   #
-########################
-
-# Returns a copy of the sentence with extra outer parentheses removed if they exist.
-# The general structure of this algorithm is from Gareth Rees on stackoverflow.com:
-# http://stackoverflow.com/questions/4284991/parsing-nested-parentheses-in-python-grab-content-by-level
-def stripOuterParens(sentence):
-    if sentence == "": return sentence
-    start = 0
-    end = len(sentence)
-    stack = []
-    pairs = {}
-    for i, char in enumerate(sentence):
-        if char == '(':
-            stack.append(i)
-        elif char == ')' and stack:
-            pairs[stack.pop()] = i
-    for i in range(0, end):
-        if i not in pairs.keys() or pairs[i] != (end - 1):
-            return sentence[start : end]
-        start = i + 1
-        end = pairs[i]
-    raise Exception("Execution should never reach here.")
-
-# Returns True if the parentheses in the string are balanced and False otherwise.
-def parensBalanced(string):
-    stack = []
-    for i, char in enumerate(string):
-        if char == '(':
-            stack.append(i)
-        elif char == ')':
-            if not stack: return False
-            stack.pop()
-    if stack: return False
-    return True
-
-# Returns (isImplication, antecedent, consequent) where:
-#   * isImplication is a boolean specifying whether statement has an outermost implication
-#   * antecedent is the antecedent of such an implication if it exists
-#   * consequent is the consequent of such an implication if it exists
-def processImplication(sentence):
-    imp_index = sentence.find(" -> ")
-    # Scans the string, looking for "phi -> psi" were phi and psi are properly formatted.
-    # Takes the first example found since implications generally bind to the left.
-    while imp_index > 0:
-        antecedent = sentence[:(imp_index)]
-        consequent = sentence[(imp_index + 4):]
-        if '(' in antecedent or ')' in antecedent:
-            if not parensBalanced(antecedent):
-                imp_index += 4 + sentence[(imp_index + 4):].find(" -> ")
-                continue
-            antecedent = stripOuterParens(antecedent.strip())
-        if '(' in consequent or ')' in consequent:
-            if not parensBalanced(consequent):
-                imp_index += 4 + sentence[(imp_index + 4):].find(" -> ")
-                continue
-            consequent = stripOuterParens(consequent.strip())
-        return (True, antecedent, consequent)
-    return (False, None, None)
+import time
+import collections
+import json
+import formula
+import search
+import heuristics
+import semantics
+import checker
 
 ################################################
 #   Fitch Proof Search Problem Formalization   #
 ################################################
 
+# A partial proof, stored persistently as its last line and a pointer to the proof it extends.
+# Successors share every earlier line with their parent, so generating one is O(1) and the frontier
+# holds one line per entry rather than a full copy of the proof.
+class ProofState(object):
+    __slots__ = ('parent', 'line', 'depth', 'length', 'hash', 'cachedIndex')
+
+    # @param parent = the ProofState this one extends, or None for the empty proof
+    # @param line = the (sentence, justification, depth) tuple added by this state
+    def __init__(self, parent = None, line = None):
+        self.parent = parent
+        self.line = line
+        self.cachedIndex = None
+        if parent is None:
+            self.depth = 0 if line is None else line[2]
+            self.length = 0 if line is None else 1
+            self.hash = 0 if line is None else hash(line)
+        else:
+            self.depth = line[2]
+            self.length = parent.length + 1
+            self.hash = hash((parent.hash, line))
+
+    # Returns the state reached by appending a line to this proof (at the current depth by default).
+    def extend(self, sentence, justification, depth = None):
+        if depth is None: depth = self.depth
+        return ProofState(self, (sentence, justification, depth))
+
+    # Returns the state reached by closing a subproof that assumed phi at the given depth and has
+    # both psi and ~psi as lines, with ~phi. Both implications are introduced from the same subproof.
+    def introduceNegation(self, phi, psi, depth):
+        state = self.extend(formula.implication(phi, psi), "II", depth)
+        state = state.extend(formula.implication(phi, formula.negation(psi)), "II", depth)
+        return state.extend(formula.negation(phi), "NI")
+
+    # Returns the state reached by writing the conjunction of some conjuncts, all in scope. And
+    # Introduction is binary, so the conjunction is built up one conjunct at a time, skipping the
+    # partial conjunctions already in scope.
+    def introduceConjunction(self, conjuncts):
+        state = self
+        conjunction = conjuncts[0]
+        for conjunct in conjuncts[1:]:
+            conjunction = formula.conjunction(conjunction, conjunct)
+            if conjunction not in state.index().sentences:
+                state = state.extend(conjunction, "AI")
+        return state
+
+    # Returns the DerivationIndex of the statements in scope at the end of this proof.
+    # Indices are built lazily (only expanded states need one) from the nearest ancestor that already
+    # has an index, one line at a time.
+    def index(self):
+        if self.cachedIndex is None:
+            pending = []
+            state = self
+            while state.cachedIndex is None and state.parent is not None:
+                pending.append(state)
+                state = state.parent
+            if state.cachedIndex is None:
+                state.cachedIndex = DerivationIndex()
+                if state.line is not None:
+                    state.cachedIndex = state.cachedIndex.apply(state.line)
+            index = state.cachedIndex
+            for state in reversed(pending):
+                index = index.apply(state.line)
+                state.cachedIndex = index
+        return self.cachedIndex
+
+    # Returns every line of the proof, in order.
+    def lines(self):
+        lines = []
+        state = self
+        while state is not None:
+            if state.line is not None:
+                lines.append(state.line)
+            state = state.parent
+        lines.reverse()
+        return lines
+
+    def __hash__(self):
+        return self.hash
+
+    # Two states are equal if they hold the same lines; shared ancestors end the comparison early.
+    def __eq__(self, other):
+        if not isinstance(other, ProofState): return False
+        if self.length != other.length: return False
+        state1, state2 = self, other
+        while state1 is not state2:
+            if state1.hash != state2.hash or state1.line != state2.line:
+                return False
+            state1, state2 = state1.parent, state2.parent
+        return True
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    # Orders states deterministically when the frontier has ties in cost, preferring longer proofs
+    # (which are further along) over shorter ones.
+    def __lt__(self, other):
+        return (-self.length, self.hash) < (-other.length, other.hash)
+
+    def __repr__(self):
+        return "ProofState(%r)" % [(str(line[0]), line[1], line[2]) for line in self.lines()]
+
+# Numbers the formulas of one proof search, in the order they first appear in a scope (or in an
+# implication in scope), so that a set
+# of them can be held as a bitset: a Python int with bit n set for the formula numbered n. Numbering
+# per search (rather than by Formula.id, which counts every formula the process has ever built)
+# keeps the bitsets as short as the search's own formulas allow.
+class FormulaNumbering(object):
+    __slots__ = ('bits', 'formulas')
+
+    def __init__(self):
+        self.bits = {}                          # Formula -> its bit (1 << number)
+        self.formulas = []                      # Number -> formula
+
+    # Returns the bit of a formula, numbering it if it hasn't been seen yet.
+    def bit(self, phi):
+        bit = self.bits.get(phi)
+        if bit is None:
+            bit = 1 << len(self.formulas)
+            self.bits[phi] = bit
+            self.formulas.append(phi)
+        return bit
+
+    # Generates the formulas whose bits are set in a bitset, lowest number first.
+    def members(self, mask):
+        formulas = self.formulas
+        while mask:
+            low = mask & -mask
+            yield formulas[low.bit_length() - 1]
+            mask ^= low
+
+# An immutable summary of the statements in scope at some point of a proof, arranged the way the
+# inference rules consume them. Each line appended to a proof produces a new index that shares every
+# collection the line doesn't change with the previous one; opening a subproof keeps a pointer to
+# the enclosing index, so closing it just resumes from there.
+#
+# Besides the sets the rules iterate over, the scope and the current subproof's body are kept as
+# bitsets under the FormulaNumbering of the proof (shared by every index derived from the same root),
+# which makes checking the body for a sentence and comparing scopes a matter of a few word operations.
+class DerivationIndex(object):
+    __slots__ = ('outer', 'depth', 'assumption', 'body', 'sentences', 'atoms', 'conjuncts',
+                 'disjunctions', 'consequents', 'biconditionals', 'doubleNegations', 'cachedKey',
+                 'numbering', 'mask', 'bodyMask')
+
+    def __init__(self):
+        self.outer = None                       # Index of the enclosing scope (None at level 0)
+        self.depth = 0                          # Subproof depth
+        self.assumption = None                  # Assumption of the current subproof
+        self.body = ()                          # Sentences after the assumption in the current subproof
+        self.sentences = frozenset()            # Every sentence in scope
+        self.numbering = FormulaNumbering()     # Numbering of the sentences for the bitsets below
+        self.mask = 0                           # Bitset of the sentences in scope
+        self.bodyMask = 0                       # Bitset of the sentences in body
+        self.atoms = frozenset()                # Atomic sentences in scope
+        self.conjuncts = frozenset()            # Conjuncts of the conjunctions in scope
+        self.disjunctions = frozenset()         # Disjunctions in scope
+        self.consequents = {}                   # Antecedent phi -> (bitset of psi such that (phi -> psi),
+                                                #                    bitset of those psi's negations)
+        self.biconditionals = frozenset()       # Biconditionals in scope
+        self.doubleNegations = frozenset()      # phi such that ~~phi is in scope
+        self.cachedKey = None
+
+    def _copy(self):
+        index = DerivationIndex.__new__(DerivationIndex)
+        for slot in DerivationIndex.__slots__:
+            setattr(index, slot, getattr(self, slot))
+        index.cachedKey = None
+        return index
+
+    # Returns a canonical key for the scope: the set of sentences at level 0, then the assumption and
+    # the set of body sentences of each open subproof (as bitsets). Proofs that reach the same facts
+    # in a different order have the same key. Keys are only comparable within one proof search.
+    def key(self):
+        if self.cachedKey is None:
+            if self.depth == 0:
+                self.cachedKey = self.mask
+            else:
+                self.cachedKey = (self.outer.key(), self.assumption, self.bodyMask)
+        return self.cachedKey
+
+    # Returns True if the sentence is a line of the current subproof's body.
+    def inBody(self, sentence):
+        return self.bodyMask & self.numbering.bits.get(sentence, 0) != 0
+
+    # Returns the index after adding a sentence to the current scope.
+    def add(self, sentence):
+        index = self._copy()
+        index.sentences = self.sentences.union((sentence,))
+        bit = self.numbering.bit(sentence)
+        index.mask = self.mask | bit
+        if self.depth > 0:
+            index.body = self.body + (sentence,)
+            index.bodyMask = self.bodyMask | bit
+        if sentence.isAtom():
+            index.atoms = self.atoms.union((sentence,))
+        elif sentence.isConjunction():
+            index.conjuncts = self.conjuncts.union(sentence.children)
+        elif sentence.isDisjunction():
+            index.disjunctions = self.disjunctions.union((sentence,))
+        elif sentence.isImplication():
+            antecedent, consequent = sentence.children
+            numbering = self.numbering
+            numbering.bit(antecedent)
+            consequents, negations = self.consequents.get(antecedent, (0, 0))
+            index.consequents = dict(self.consequents)
+            index.consequents[antecedent] = (consequents | numbering.bit(consequent),
+                                             negations | numbering.bit(formula.negation(consequent)))
+        elif sentence.isBiconditional():
+            index.biconditionals = self.biconditionals.union((sentence,))
+        elif sentence.children[0].isNegation():
+            index.doubleNegations = self.doubleNegations.union(sentence.children[0].children)
+        return index
+
+    # Returns the index of a new subproof opened by assuming the sentence.
+    def assume(self, sentence):
+        index = self.add(sentence)
+        index.outer = self
+        index.depth = self.depth + 1
+        index.assumption = sentence
+        index.body = ()
+        index.bodyMask = 0
+        return index
+
+    # Returns the index after the current subproof is closed and its conclusion added to the enclosing scope.
+    def close(self, sentence):
+        return self.outer.add(sentence)
+
+    # Returns the index after a (sentence, justification, depth) line is appended to the proof.
+    def apply(self, line):
+        sentence, justification, depth = line
+        if depth > self.depth:
+            return self.assume(sentence)
+        if depth < self.depth:
+            return self.close(sentence)
+        return self.add(sentence)
+
+# Remembers the subproofs a search has written, so that a later branch opening the same subproof
+# can reuse them rather than derive everything again. A subproof is filed under its assumption phi
+# and each conclusion psi reached in its body, together with the bitset of the sentences in scope
+# outside it (see DerivationIndex) and its lines. Those lines stay valid wherever phi is assumed with
+# at least the same sentences in scope, so for each (phi, psi) only the subproofs needing the least
+# outer scope are kept, and the shortest among equals.
+#
+# Within one search, a subproof opened again in the same scope is already merged by the state keys,
+# so the memo pays off when searches start over from the same proof (see findFitchProofs). Since the
+# bitsets come from the proof's FormulaNumbering, a memo must only be shared between problems whose
+# start states extend the same proof.
+class SubproofMemo(object):
+    # @param relevant = the implications phi -> psi worth remembering subproofs for
+    def __init__(self, relevant):
+        self.relevant = relevant
+        self.table = {}                         # phi -> {psi -> [(outer scope bitset, lines)]}
+
+    # Records the subproof the state ends in, if its last line is a relevant conclusion of that
+    # subproof's body. Lines are stored with depths relative to the assumption.
+    def record(self, state):
+        index = state.index()
+        sentence, justification, depth = state.line
+        if depth != index.depth or justification == "A":
+            return
+        if formula.implication(index.assumption, sentence) not in self.relevant:
+            return
+        lines = []
+        start = state
+        while start.line[1] != "A" or start.line[2] != depth:
+            lines.append(start.line)
+            start = start.parent
+        lines.append(start.line)
+        outerMask = start.parent.index().mask
+
+        entries = self.table.setdefault(index.assumption, {}).setdefault(sentence, [])
+        kept = []
+        for mask, previous in entries:
+            if mask & ~outerMask == 0 and len(previous) <= len(lines):
+                return                          # An earlier subproof needs no more and is no longer
+            if not (outerMask & ~mask == 0 and len(lines) <= len(previous)):
+                kept.append((mask, previous))
+        lines.reverse()
+        kept.append((outerMask, tuple((phi, rule, lineDepth - depth) for phi, rule, lineDepth in lines)))
+        entries[:] = kept
+
+    # Returns {psi: lines} of the shortest recorded subproofs that assume phi and reach psi, among those
+    # whose outer scope is part of the given index's scope.
+    def subproofs(self, phi, index):
+        best = {}
+        for psi, entries in self.table.get(phi, {}).iteritems():
+            for mask, lines in entries:
+                if mask & ~index.mask == 0 and (psi not in best or len(lines) < len(best[psi])):
+                    best[psi] = lines
+        return best
+
+# The costs FitchProblem charges for the rules it treats specially; every other rule costs 1.
+# Different problems favor different settings, so they can be varied (see portfolio.py). The A*
+# heuristics count lines, so any profile that keeps every rule but Assumption at a cost of at least 1
+# keeps them admissible.
+class CostProfile(object):
+    # @param assumptionGrowth = an assumption opening subproof level d (past the second) costs this ** d
+    # @param guidedAssumptionBias = multiplier for assuming an implication from the goal, or its antecedent
+    # @param symbolAssumptionBias = multiplier for assuming a symbol (or its negation) when such guided
+    #   assumptions are available as well
+    # @param conjunctionCost, repeatedConjunctionCost = cost of And Introduction (of phi && phi for the latter)
+    # @param disjunctionCostPerCharacter = Or Introduction costs this times the length of the disjunction
+    #   (at least 1), unless the disjunction is the goal
+    def __init__(self, assumptionGrowth = 2, guidedAssumptionBias = 0.25, symbolAssumptionBias = 3,
+                 conjunctionCost = 3, repeatedConjunctionCost = 10, disjunctionCostPerCharacter = 1):
+        self.assumptionGrowth = assumptionGrowth
+        self.guidedAssumptionBias = guidedAssumptionBias
+        self.symbolAssumptionBias = symbolAssumptionBias
+        self.conjunctionCost = conjunctionCost
+        self.repeatedConjunctionCost = repeatedConjunctionCost
+        self.disjunctionCostPerCharacter = disjunctionCostPerCharacter
+
+    # Returns the profile as a JSON-serializable dict of its costs, which CostProfile(**values) rebuilds.
+    def toDict(self):
+        return dict(self.__dict__)
+
+    def __repr__(self):
+        return "CostProfile(%s)" % ", ".join("%s = %r" % item for item in sorted(self.__dict__.items()))
+
+# The costs the solver was tuned with
+DEFAULT_COSTS = CostProfile()
+
+# Reads a CostProfile saved as JSON (as tuning.py writes them). Costs the file leaves out keep
+# their defaults.
+def loadCostProfile(path):
+    with open(path) as profileFile:
+        values = json.load(profileFile)
+    unknown = set(values) - set(DEFAULT_COSTS.toDict())
+    if unknown:
+        raise ValueError("Unknown costs in %s: %s" % (path, ", ".join(sorted(unknown))))
+    return CostProfile(**dict((str(name), value) for name, value in values.items()))
+
 # Defines finding a proof in the Fitch system as a search problem
 # SearchProblem class from CS221: Artificial Intelligence assignment 3: Text Reconstruction
 class FitchProblem(util.SearchProblem):
     # @param premises = list [] of statements using the supplied symbolic conventions
     # @param goal = a statement to be proved, written using the supplied symbolic convenctions
-    def __init__(self, premises, goal, symbolSet, statementSet, connectiveSet):
+    # @param start = a ProofState to search on from instead of the premises (see subproblem)
+    def __init__(self, premises, goal, symbolSet, statementSet, connectiveSet, start = None):
         self.premises = premises
         self.goal = goal
+        self.goals = frozenset() if goal is None else frozenset((goal,))      # sentences that end the search
         self.symbols = symbolSet
         self.statementSet = statementSet
         self.connectiveSet = connectiveSet
+        self.start = start
+        self.baseDepth = 0 if start is None else start.depth
+        # Lines already written after the premises when the search starts
+        self.startLength = 0 if start is None else start.length - len(premises)
+        self.stats = None                   # stats.SearchStats to charge each rule's time to, if any
+        self.entailed = None                # formulas known to be true in every model of the premises, if any
+        self.costs = DEFAULT_COSTS          # CostProfile of the rules
+        self.memo = None                    # SubproofMemo to record subproofs in and replay them from, if any
+
+    # Returns the problem of proving a goal from some point of a proof (possibly inside a subproof):
+    # the search starts at the given state, and ends with the goal written at the state's subproof
+    # level, without ever closing a subproof that was already open at the start.
+    def subproblem(self, start, goal):
+        problem = FitchProblem(self.premises, goal, self.symbols, self.statementSet, self.connectiveSet, start)
+        problem.stats = self.stats
+        problem.costs = self.costs
+        problem.memo = self.memo
+        if start.depth == 0:
+            problem.entailed = self.entailed
+        return problem
 
     # Defines the start state of the search graph given the premises, goal, and symbols
     # The start state is a proof consisting only of premises at assumption level 0.
     def startState(self):
-        # A state is defined by a list of tuples, each tuple containing a true statement, its justification, and its proof depth
-        statements = []
+        if self.start is not None:
+            return self.start
+        # A state is a ProofState: the last (statement, justification, depth) line of the proof plus a
+        # pointer to the state it extends. Subproof level is initially 0.
+        state = ProofState()
         for premise in self.premises:
-            statements.append((premise, "Premise", 0))
-        # The full form of a state is tuple([list of statement, justification, depth tuples], sub-proof level).
-        # Subproof level is initially 0.
-        return (tuple(statements), 0)
+            state = state.extend(premise, "Premise")
+        return state
 
     # Defines the end state of the search graph
     # The end state is defined to be any proof which contains the goal as a non-premise at sub-proof level 0
+    # (or at the level of the start state, for a subproblem)
     def isEnd(self, state):
-        statements = list(state[0])
-        if len(statements) == 0: return False
-        lastStatement = statements[len(statements) - 1]
+        lastStatement = state.line
+        if lastStatement is None: return False
         # For a state to be the end state, must contain the goal and be at base level (not in a subproof)
-        if lastStatement[0] == self.goal and lastStatement[1] != "Premise" and lastStatement[2] == 0:
+        if lastStatement[0] in self.goals and lastStatement[1] != "Premise" and lastStatement[2] == self.baseDepth:
             return True
         return False
 
+    # Canonical key used by the search engines to merge states reached by different derivation
+    # orders (see DerivationIndex.key). Whether the state finishes the proof is part of the key,
+    # since reiterating the goal doesn't change the scope.
+    def stateKey(self, state):
+        return (self.isEnd(state), state.index().key())
+
     # Defines the successor state and costs of the given state, represnting a partial proof
     # Successor states are a proof with an added set of lines generated by using one of the Fitch
     # rules of inference.
     # The proof generator only considers proof steps on symbols contained in the symbol set.
     # For the prototype, all paths will have the same cost.
     #
+    # Sentences are interned formula.Formula trees, parsed once by solveFitchProof.
+    #
     # @return a list of possible (action, newState, cost) tuples representing successor states.
-    #   The return type is:    list of (string, [(sentence, justification, depth), (sentence, justification, depth), etc.], int) tuples
+    #   The return type is:    list of (string, [(Formula, justification, depth), (Formula, justification, depth), etc.], int) tuples
     def succAndCost(self, state):
-        
-        # Occassionally prints the current state being searched (for testing)
-        '''
-        if random.random() > 0.9995:
-            print state
-        '''
+        results = []
+        for _, successors in self.successorGroups(state):
+            results.extend(successors)
+        return results
+
+    # The successors of succAndCost, in groups that search.AStarSearch can expand lazily: a list of
+    # (lowest cost, successors) pairs, where successors is either a list of (action, newState, cost)
+    # tuples or a generator of them in order of increasing cost, none cheaper than the lowest cost.
+    # And Introduction (quadratic in the sentences in scope) and Or Introduction (one per sentence and
+    # symbol) are generators, and are rarely taken, so most of their successors are never built.
+    def successorGroups(self, state):
+        # Times each block of rules below, when collecting statistics (for the generated rules, only
+        # the time to set them up)
+        stats = self.stats
+        if stats is not None: stats.startRules()
 
         results = []
-        allStatements = list(state[0])      # (sentence, justification, depth) tuples
-        proofDepth = state[1]               # the subproof depth of the last statement in the proof
+        groups = [(0, results)]
+        proofDepth = state.depth            # the subproof depth of the last statement in the proof
         whitespace = ""
         for _ in range(proofDepth):
             whitespace += "  "
 
-        # Extract the statements that matter from the list of all statements made in the proof so far
-        # This includes all statements at level 0 and anything in the scope of the current subproof
-        # Also makes a list of the sentences alone to help check whether we're being redundent
-        statements = []
-        sentences = []
-        maxDepthAllowed = proofDepth
-        for i, statement in reversed(list(enumerate(allStatements))):
-            depth = statement[2]
-            if depth < maxDepthAllowed:
-                maxDepthAllowed -= 1
-            elif depth > maxDepthAllowed:
-                continue
-            statements.append(statement)
-            sentences.append(statement[0])
-        # Puts all the statements back into the correct ordering
-        statements.reverse()
+        # The statements that matter are everything at level 0 and anything in the scope of the current
+        # subproof. Rather than re-walking the proof, each state carries an index of them that is
+        # updated from its parent's index by the one line it adds.
+        index = state.index()
+        sentences = index.sentences         # frozenset of every sentence in scope
+
+        # Files the subproof this state is in with the memo, if the state concluded something in it
+        memo = self.memo
+        if memo is not None and proofDepth > self.baseDepth:
+            memo.record(state)
 
         # An edge case of sorts: if we already have the answer but as a premise, just reiterate it and move on.
-        if self.goal in sentences:
-            succStatements = list(state[0])
-            succStatements.append((self.goal, "R", state[1]))
-            succState = (tuple(succStatements), state[1])
-            results.append((whitespace + "Reiteration: " + self.goal, succState, 1))
-            return results
+        for goal in self.goals:
+            if goal in sentences:
+                succState = state.extend(goal, "R")
+                results.append((whitespace + "Reiteration: " + goal.text, succState, 1))
+                if stats is not None: stats.endRule("R")
+                return groups
+
+        costs = self.costs
 
         # Assumptions
         def Acost(depth):
             if depth <= 2: return max(1, depth)
-            return 2**(depth)
+            return costs.assumptionGrowth**(depth)
+        # Opening a deeper subproof gets expensive quickly, so these are generated lazily as well.
         # Bias argument allows adjustment of cost if, say, we know the assumption is probably a good idea.
-        def addAssumption(symbol, bias = 1):
-            cost = Acost(state[1] + 1) * bias
-            succStatements = list(state[0])
-            succStatements.append((symbol, "A", state[1] + 1))
-            succState = (tuple(succStatements), state[1] + 1)
-            A_whitespace = "  " + whitespace
-            results.append((A_whitespace + "Assumption: " + symbol, succState, cost))
-
-        # Tries to assume the opposite (of a non-implication) or the antecedent (of an implication)
-        isImplication = False
-        assumedSomething = False
+        def assumptions(candidates, bias = 1):
+            cost = Acost(state.depth + 1 - self.baseDepth) * bias
+            def generate():
+                for symbol in candidates:
+                    succState = state.extend(symbol, "A", state.depth + 1)
+                    A_whitespace = "  " + whitespace
+                    yield (A_whitespace + "Assumption: " + symbol.text, succState, cost)
+            groups.append((cost, generate()))
+
+            # Subproofs from the assumption that another branch already wrote, replayed and closed in
+            # one step. A replay is charged for the assumption and then 1 for each line it writes after
+            # it, Implication Introduction included, so it costs at least as much as the heuristics
+            # count for those lines, and A* stays optimal. Reusing a subproof saves the states it took
+            # to find, not lines.
+            replays = []
+            for symbol in (candidates if memo is not None else ()):
+                for psi, lines in memo.subproofs(symbol, index).iteritems():
+                    conclusion = formula.implication(symbol, psi)
+                    if conclusion not in sentences:
+                        replays.append((cost + len(lines), lines, conclusion))
+            if replays:
+                replays.sort(key = lambda replay: replay[0])
+                def replay():
+                    for replayCost, lines, conclusion in replays:
+                        succState = state
+                        for sentence, justification, depth in lines:
+                            succState = succState.extend(sentence, justification, state.depth + 1 + depth)
+                        succState = succState.extend(conclusion, "II", state.depth)
+                        action = "\n".join(actionString(line) for line in succState.lines()[state.length:])
+                        yield (action, succState, replayCost)
+                groups.append((replays[0][0], replay()))
+
+        # Tries to assume the antecedent (of an implication) or the implication itself
+        guided = []
         for sentence in self.statementSet:
-            if len(allStatements) <= len(self.statementSet) and sentence != self.goal:
-                if "->" in sentence:
-                    isImplication, antecedent, consequent = processImplication(sentence)
-                    if isImplication:
-                        if sentence not in sentences:
-                            addAssumption(sentence, 0.25)
-                            assumedSomething = True
-                        if antecedent not in sentences:
-                            addAssumption(antecedent, 0.25)
-                            assumedSomething = True
-
-                # The following ended up being too specific a strategy for the general problem, so I've omitted it.
-                '''
-                if not isImplication:
-                    if ("&&" in sentence or "||" in sentence or "->" in sentence):
-                        addAssumption("~(" + sentence + ")", 0.75)
-                        assumedSomething = True
-                    else:
-                        addAssumption("~" + sentence, 0.75)
-                        assumedSomething = True
-                '''
+            if state.length - self.startLength <= len(self.statementSet) and sentence not in self.goals:
+                if sentence.isImplication():
+                    antecedent, consequent = sentence.children
+                    if sentence not in sentences:
+                        guided.append(sentence)
+                    if antecedent not in sentences:
+                        guided.append(antecedent)
+        assumedSomething = len(guided) > 0
+        if assumedSomething:
+            assumptions(guided, costs.guidedAssumptionBias)
 
         # Assumptions of single propositional constants and their negations
+        constants = []
         for symbol in self.symbols:
-            cost = 3 if assumedSomething else 1
-            addAssumption(symbol, cost)
-            addAssumption("~" + symbol, cost)
+            constants.append(symbol)
+            constants.append(formula.negation(symbol))
+        assumptions(constants, costs.symbolAssumptionBias if assumedSomething else 1)
+        if stats is not None: stats.endRule("A")
 
-        # Used for And Introduction and And Elimination
-        if "&&" in self.connectiveSet:
-            atoms = set()
-            conjuncts = set()
-
-        # Used for Or Elimination
-        if "||" in self.connectiveSet:
-            disjuncts = set()
-
-        # Gathers implications -- Used for Negation Introduction (and Or Elimination, if applicable)
-        phi_to_psi = {}                 # Dict from string to list(string) representing phi to all psi
-        phi_to_not_psi = {}             # Dict from string to list(string) representing phi to all not psi
-
-        # Most of the rules of inference are covered or prepped for within this for loop.
-        for statement in statements:
-
-            if "&&" in self.connectiveSet:
-                # And Introduction
-                sentence = statement[0]
-                atoms.add(sentence)
-
-                # And Elimination
-                sentenceCopy = statement[0]
-                and_index = sentenceCopy.find(" && ")
-                while and_index != -1:
-                    conjunct = sentenceCopy[:(and_index)]
-                    # If the parentheses are balanced in the string it is assumed to be a proper conjunct
-                    if parensBalanced(conjunct):
-                        conjuncts.add(conjunct)
-                    sentenceCopy = sentenceCopy[(and_index + 4):]
-                    and_index = sentenceCopy.find(" && ")
-                # Loop and a half
-                conjunct = sentenceCopy
-                if conjunct != "":
-                    if parensBalanced(conjunct):
-                        conjuncts.add(conjunct)
-
-            if "||" in self.connectiveSet:
-                # Or Introduction
-                sentence = statement[0]
-                def addDisjunction(disjunction):
-                    # The cost below determines the efficiency of the algorithm to a large degree
-                    cost = 1 if (disjunction == self.goal) else len(disjunction)
-                    succStatements = list(state[0])
-                    succStatements.append((disjunction, "OI", state[1]))
-                    succState = (tuple(succStatements), state[1])
-                    results.append((whitespace + "Or Introduction: " + disjunction, succState, cost))
-                # We deliberately hamper this rule because it is not very interesting.
-                if len(sentence) == 1:
-                    for symbol in self.symbols:
-                        disjunction = sentence + " || " + symbol
-                        if disjunction not in sentences:
-                            addDisjunction(disjunction)
-                        not_disjunction = sentence + " || ~" + symbol
-                        if not_disjunction not in sentences:
-                            addDisjunction(not_disjunction)
-
-                # Or Elimination
-                sentenceCopy = statement[0]
-                disjunct = []   # List of statements connected by "||"
-                or_index = sentenceCopy.find(" || ")
-                if or_index > -1:
-                    while or_index > -1:
-                        atom = sentenceCopy[:(or_index)]
-                        # If the parentheses are balanced for the atom, we take it to properly be part of a disjunction
-                        if parensBalanced(atom):
-                            disjunct.append(atom)
-                        sentenceCopy = sentenceCopy[(or_index + 4):]
-                        or_index = sentenceCopy.find(" || ")
-                    # Loop and a half
-                    disjunct.append(sentenceCopy)
-                    disjuncts.add(tuple(disjunct))
-
-            # Negation Introduction
-            sentence = statement[0]
-            isImplication, antecedent, consequent = processImplication(sentence)
-            if isImplication:
-                if consequent[0] == "~":
-                    if antecedent not in phi_to_not_psi.keys():
-                        phi_to_not_psi[antecedent] = list()
-                    phi_to_not_psi[antecedent].append(consequent[1:])
-                else:
-                    if antecedent not in phi_to_psi.keys():
-                        phi_to_psi[antecedent] = list()
-                    phi_to_psi[antecedent].append(consequent)
-
-            # Negation Elimination
-            if sentence[:2] == "~~":
-                newSentence = stripOuterParens(sentence[2:])
-                if newSentence not in sentences:
-                    succStatements = list(state[0])
-                    succStatements.append((newSentence, "NE", state[1]))
-                    succState = (tuple(succStatements), state[1])
-                    results.append((whitespace + "Negation Elimination: " + newSentence, succState, 1))
-
-            # Implication Elimination
-            # Reuses the implication processing from the NI step.
-            if isImplication:
-                # Loops through all statements and sees if antecedent appears enabling us to derive consequent
-                for statement2 in statements:
-                    if statement2 == statement:
-                        continue
-                    sentence2 = statement2[0]
-                    if sentence2 == antecedent and consequent not in sentences:
-                        succStatements = list(state[0])
-                        succStatements.append((consequent, "IE", state[1]))
-                        succState = (tuple(succStatements), state[1])
-                        results.append((whitespace + "Implication Elimination: " + consequent, succState, 1))
-
-            # Biconditional Elimination
-            def addBicondElimStatement(lhs, rhs, statements):
-                newImplication = lhs + " -> " + rhs
-                if newImplication not in sentences:
-                    succStatements = list(state[0])
-                    succStatements.append((newImplication, "BE", state[1]))
-                    succState = (tuple(succStatements), state[1])
-                    results.append((whitespace + "Biconditional Elimination: " + newImplication, succState, 1))
-
-            if "<->" in self.connectiveSet:
-                sentence = statement[0]
-                bicond_index = sentence.find(" <-> ")
-                while bicond_index > 0:
-                    first = sentence[:(bicond_index)]
-                    second = sentence[(bicond_index + 5):]
-                    addBicondElimStatement(first, second, statements)
-                    addBicondElimStatement(second, first, statements)
-                    bicond_index = sentence[(bicond_index + 5):].find(" <-> ")
+        # Maps each antecedent phi in scope to the bitsets of all psi such that (phi -> psi) is in scope,
+        # and of their negations. Implication Elimination, Negation Introduction, Or Elimination and
+        # Biconditional Introduction are all a few bitwise operations on these per antecedent.
+        phi_to_psi = index.consequents
+        numbering, mask = index.numbering, index.mask
+        bits = numbering.bits
 
         if "&&" in self.connectiveSet:
-            # Finishes adding all possible statements from And Introduction
-            for atom1 in atoms:
-                for atom2 in atoms:
-                    conjunction = atom1.strip() + " && " + atom2.strip()
-                    if conjunction not in sentences:
-                        # We punish this rule of inference as well for being, quite frankly, not very interesting
-                        cost = 10 if atom1 == atom2 else 3
-                        succStatements = list(state[0])
-                        succStatements.append((conjunction, "AI", state[1]))
-                        succState = (tuple(succStatements), state[1])
-                        results.append((whitespace + "And Introduction: " + conjunction, succState, cost))
-
-            # Finishes adding all possible statements from And Elimination
-            for conjunct in conjuncts:
+            # And Introduction
+            # We punish this rule of inference as well for being, quite frankly, not very interesting
+            def conjunctions(repeated, cost):
+                for atom1 in sentences:
+                    for atom2 in ((atom1,) if repeated else sentences):
+                        if atom1 == atom2 and not repeated:
+                            continue
+                        conjunction = formula.conjunction(atom1, atom2)
+                        if conjunction not in sentences:
+                            succState = state.extend(conjunction, "AI")
+                            yield (whitespace + "And Introduction: " + conjunction.text, succState, cost)
+            groups.append((costs.conjunctionCost, conjunctions(False, costs.conjunctionCost)))
+            groups.append((costs.repeatedConjunctionCost, conjunctions(True, costs.repeatedConjunctionCost)))
+            if stats is not None: stats.endRule("AI")
+
+            # And Elimination
+            for conjunct in index.conjuncts:
                 if conjunct not in sentences:
-                    succStatements = list(state[0])
-                    succStatements.append((conjunct, "AE", state[1]))
-                    succState = (tuple(succStatements), state[1])
-                    results.append((whitespace + "And Elimination: " + conjunct, succState, 1))   
+                    succState = state.extend(conjunct, "AE")
+                    results.append((whitespace + "And Elimination: " + conjunct.text, succState, 1))
+            if stats is not None: stats.endRule("AE")
 
         if "||" in self.connectiveSet:
-            # Finishes adding all possible statement from Or Elimination
-            def addOrElimStatement(psi):
-                succStatements = list(state[0])
-                succStatements.append((psi, "OE", state[1]))
-                succState = (tuple(succStatements), state[1])
-                results.append((whitespace + "Or Elimination: " + psi, succState, 1))
-            
+            # Or Introduction
+            # We deliberately hamper this rule because it is not very interesting.
+            def disjunctions():
+                candidates = []
+                for sentence in index.atoms:
+                    for symbol in self.symbols:
+                        for disjunct in (symbol, formula.negation(symbol)):
+                            disjunction = formula.disjunction(sentence, disjunct)
+                            if disjunction not in sentences:
+                                # The cost below determines the efficiency of the algorithm to a large degree
+                                cost = 1 if (disjunction in self.goals) else max(1, costs.disjunctionCostPerCharacter * len(disjunction.text))
+                                candidates.append((cost, disjunction))
+                candidates.sort(key = lambda candidate: candidate[0])
+                for cost, disjunction in candidates:
+                    succState = state.extend(disjunction, "OI")
+                    yield (whitespace + "Or Introduction: " + disjunction.text, succState, cost)
+            groups.append((1, disjunctions()))
+            if stats is not None: stats.endRule("OI")
+
+            # Or Elimination
             # Iterates through atoms in each disjunct and derives all things implied by every disjuncted unit
-            for disjunction in list(disjuncts):    # List of disjuncted atoms
-                isEntailed = True
-                # Populate a list with all examples of psi for some implication statement (phi -> psi)
-                psi_list = []
-                for psi_l in phi_to_psi.values():
-                    for psi in psi_l:
-                        psi_list.append(psi)
-                for not_psi_l in phi_to_not_psi.values():
-                    for not_psi in not_psi_l:
-                        psi_list.append("~" + not_psi)
-                # Iterate through every psi and, if (phi -> psi) exists for every phi in the disjunction,
-                # then we can add an or elimination statement containing psi
-                for psi in psi_list:
-                    if psi[:1] == "~":
-                        for phi in disjunction:
-                           if phi not in phi_to_not_psi.keys() or psi.strip("~") not in phi_to_not_psi[phi]:
-                                isEntailed = False
-                    else:
-                        for phi in disjunction:
-                            if phi not in phi_to_psi.keys() or psi not in phi_to_psi[phi]:
-                                isEntailed = False
-                    if isEntailed and psi not in sentences:
-                        addOrElimStatement(psi)
-
-        # Processes the dicts built during the above for loop to cover Negation Introduction cases
-        for phi in phi_to_psi.keys():
-            for psi in phi_to_psi[phi]:
-                if phi in phi_to_not_psi.keys() and psi in phi_to_not_psi[phi]:
-                    negation = "~" + phi
-                    if negation not in sentences:
-                        succStatements = list(state[0])
-                        succStatements.append((negation, "NI", state[1]))
-                        succState = (tuple(succStatements), state[1])
-                        results.append((whitespace + "Negation Introduction: " + negation, succState, 1))
+            for disjunction in index.disjunctions:
+                # psi can be derived if (phi -> psi) exists for every phi in the disjunction
+                entailed = ~mask
+                for phi in disjunction.children:
+                    entailed &= phi_to_psi.get(phi, (0, 0))[0]
+                    if not entailed:
+                        break
+                for psi in numbering.members(entailed):
+                    succState = state.extend(psi, "OE")
+                    results.append((whitespace + "Or Elimination: " + psi.text, succState, 1))
+            if stats is not None: stats.endRule("OE")
+
+        # Negation Elimination
+        for newSentence in index.doubleNegations:
+            if newSentence not in sentences:
+                succState = state.extend(newSentence, "NE")
+                results.append((whitespace + "Negation Elimination: " + newSentence.text, succState, 1))
+        if stats is not None: stats.endRule("NE")
+
+        # Implication Elimination
+        # If the antecedent appears among the statements, we can derive each consequent
+        for phi, (consequents, negations) in phi_to_psi.iteritems():
+            if mask & bits[phi]:
+                for consequent in numbering.members(consequents & ~mask):
+                    succState = state.extend(consequent, "IE")
+                    results.append((whitespace + "Implication Elimination: " + consequent.text, succState, 1))
+        if stats is not None: stats.endRule("IE")
+
+        # Negation Introduction
+        # If 'phi -> psi' and 'phi -> ~psi' for any psi, can derive '~phi'
+        for phi, (consequents, negations) in phi_to_psi.iteritems():
+            if consequents & negations:
+                negation = formula.negation(phi)
+                if negation not in sentences:
+                    succState = state.extend(negation, "NI")
+                    results.append((whitespace + "Negation Introduction: " + negation.text, succState, 1))
+        if stats is not None: stats.endRule("NI")
+
+        # Biconditional Elimination
+        def addBicondElimStatement(lhs, rhs):
+            newImplication = formula.implication(lhs, rhs)
+            if newImplication not in sentences:
+                succState = state.extend(newImplication, "BE")
+                results.append((whitespace + "Biconditional Elimination: " + newImplication.text, succState, 1))
+
+        if "<->" in self.connectiveSet:
+            for biconditional in index.biconditionals:
+                first, second = biconditional.children
+                addBicondElimStatement(first, second)
+                addBicondElimStatement(second, first)
+            if stats is not None: stats.endRule("BE")
 
         # Implication Introduction and Reiteration
-        if proofDepth > 0:
-            subproof = []
-            # Gets a list of all statements in the most recent subproof
-            for i in range(len(statements)):
-                if statements[i][2] < proofDepth:
-                    subproof = []
-                    continue
-                elif statements[i][2] > proofDepth:
-                    continue
-                subproof.append(statements[i])
-
-            # Allows Implication Introduction from the assumption to any reached conclusion
-            assumption = subproof[0]
-            assert assumption[1] == "A"
-            for statement in subproof[1:]:
-                # If the antecedent contains an implication or biconditional, we need parens around it
-                if "->" in assumption[0]:
-                    antecedent = "(" + assumption[0] + ")"
-                else:
-                    antecedent = assumption[0]
-                newImplication = antecedent + " -> " + statement[0]
+        # (subproofs open when the search started are left for the caller to close)
+        if proofDepth > self.baseDepth:
+            # Allows Implication Introduction from the assumption of the current subproof to any reached conclusion
+            for sentence in index.body:
+                newImplication = formula.implication(index.assumption, sentence)
                 if newImplication not in sentences:
-                    succStatements = list(state[0])
-                    succStatements.append((newImplication, "II", state[1] - 1))
-                    succState = (tuple(succStatements), state[1] - 1)
+                    succState = state.extend(newImplication, "II", state.depth - 1)
                     II_whitespace = whitespace[2:]
-                    results.append((II_whitespace + "Implication Introduction: " + newImplication, succState, 1))
+                    results.append((II_whitespace + "Implication Introduction: " + newImplication.text, succState, 1))
+            if stats is not None: stats.endRule("II")
 
+        if proofDepth > 0:
             # Reiteration of statements allowed if we're inside a subproof
+            # (anything in scope that isn't already a line of the subproof body)
+            bodyMask = index.bodyMask
             for sentence in sentences:
-                if sentence not in subproof or self.goal == sentence:
-                    succStatements = list(state[0])
-                    succStatements.append((sentence, "R", state[1]))
-                    succState = (tuple(succStatements), state[1])
-                    results.append((whitespace + "Reiteration: " + sentence, succState, 1))
-
+                if not bodyMask & bits[sentence]:
+                    succState = state.extend(sentence, "R")
+                    results.append((whitespace + "Reiteration: " + sentence.text, succState, 1))
+            if stats is not None: stats.endRule("R")
 
         # Biconditional Introduction
         # If 'phi -> psi' and 'psi -> phi' for any phi and psi, can derive 'phi <-> psi'
         if "<->" in self.connectiveSet:
-            phi_to_psi.update(phi_to_not_psi)   # Merges the 2 implication dicts
-            for phi in phi_to_psi.keys():
-                psi = phi_to_psi[phi]
-                if psi in phi_to_psi.keys() and phi in phi_to_psi[psi]:
-                    newBicond = phi + " <-> " + psi
+            antecedents = 0
+            for phi in phi_to_psi:
+                antecedents |= bits[phi]
+            for phi, (consequents, negations) in phi_to_psi.iteritems():
+                for psi in numbering.members(consequents & antecedents):
+                    if not phi_to_psi[psi][0] & bits[phi]:
+                        continue
+                    newBicond = formula.biconditional(phi, psi)
                     if newBicond not in sentences:
-                        succStatements = list(state[0])
-                        succStatements.append((newBicond, "BI", state[1]))
-                        succState = (tuple(succStatements), state[1])
-                        results.append((whitespace + "Biconditional Introduction: " + newBicond, succState, 1))
-        
-        return results
+                        succState = state.extend(newBicond, "BI")
+                        results.append((whitespace + "Biconditional Introduction: " + newBicond.text, succState, 1))
+            if stats is not None: stats.endRule("BI")
+
+        return groups
+
+# Proving several goals from the same premises with one search (see findFitchProofs): the search
+# ends as soon as any of the goals is written at the start state's level. goal is None; the
+# heuristics see one single-goal problem per goal, through nearestGoalHeuristic.
+class MultiGoalProblem(FitchProblem):
+    def __init__(self, premises, goals, symbolSet, statementSet, connectiveSet, start = None):
+        FitchProblem.__init__(self, premises, None, symbolSet, statementSet, connectiveSet, start)
+        self.goals = frozenset(goals)
+        self.cachedViews = None
+
+    # Returns a single-goal problem for each goal, sharing this problem's start, costs and entailments.
+    def views(self):
+        if self.cachedViews is None:
+            start = self.startState()
+            self.cachedViews = []
+            for goal in sorted(self.goals, key = lambda goal: goal.text):
+                view = self.subproblem(start, goal)
+                view.entailed = self.entailed
+                self.cachedViews.append(view)
+        return self.cachedViews
+
+# Returns a heuristic for a MultiGoalProblem: the smallest estimate the given heuristic makes for any
+# one of the goals, which stays admissible if the heuristic is.
+def nearestGoalHeuristic(heuristic):
+    def estimate(problem, state):
+        return min(heuristic(view, state) for view in problem.views())
+    return estimate
+
+# Search engines selectable in solveFitchProof, other than plain UCS: name -> (default heuristic, weight)
+ENGINES = {
+    "astar": (heuristics.goalStructureHeuristic, 1),    # A* with an admissible heuristic
+    "fast": (heuristics.fastHeuristic, 2),              # Weighted A*; quick, but proofs may be longer
+    "ida": (heuristics.goalStructureHeuristic, 1),      # Iterative-deepening A*; slower, in bounded memory
+    "plan": (heuristics.goalStructureHeuristic, 1),     # Backward decomposition of the goal, A* for the rest
+    "refute": (search.nullHeuristic, 1),                # Proof by contradiction from a DPLL refutation
+}
+
+# Engines run with search.IDAStarSearch rather than search.AStarSearch
+MEMORY_BOUNDED_ENGINES = set(["ida"])
+
+# Names of the inference rules, by the justification recorded on each proof line
+RULE_NAMES = {
+    "A": "Assumption", "R": "Reiteration",
+    "AI": "And Introduction", "AE": "And Elimination",
+    "OI": "Or Introduction", "OE": "Or Elimination",
+    "II": "Implication Introduction", "IE": "Implication Elimination",
+    "NI": "Negation Introduction", "NE": "Negation Elimination",
+    "BI": "Biconditional Introduction", "BE": "Biconditional Elimination",
+}
+
+# Returns the printed proof step for a (sentence, justification, depth) line, as in the actions
+# produced by FitchProblem.succAndCost.
+def actionString(line):
+    sentence, justification, depth = line
+    return "  " * depth + RULE_NAMES[justification] + ": " + sentence.text
+
+# Returns the justification of the line a state adds (the rule that produced it), for stats.SearchStats.
+def ruleOf(state):
+    if state.line is None:
+        return None
+    return state.line[1]
+
+# The outcome of a proof search.
+class ProofResult(object):
+    # @param status = "proved", "invalid" (the goal doesn't follow from the premises), "timeout" (out of
+    #   time), "cancelled" (stopped from outside), "exhausted" (out of nodes, or no proof exists) or
+    #   "rejected" (a proof came back from another process, but checker.py found it wrong)
+    # @param lines = the (sentence, justification, depth) lines of the proof after the premises
+    # @param actions = the printed proof steps, one per line
+    # @param cached = whether the proof came from a proofcache.ProofCache instead of a search
+    # @param counterModel = for "invalid" results, {symbol name: value} making the premises true and the goal false
+    # @param strategy = for results of a portfolio (see portfolio.py), the name of the strategy that produced it
+    # @param budgetExceeded = "time", "nodes" or "cancelled" if the search was stopped before it could finish
+    #   (None if it finished, with or without a proof)
+    # @param partialLines = for results without a proof, the lines of the most promising unfinished proof
+    #   the search reached, if any
+    # @param linesLeft = a lower bound on the lines the unfinished proof still needs (see heuristics.py)
+    # @param error = for "rejected" results, what was wrong with the proof
+    def __init__(self, status, premises, goal, lines = None, actions = None, nodes = 0, runtime = 0.0, cost = None,
+                 cached = False, stats = None, counterModel = None, strategy = None, budgetExceeded = None,
+                 partialLines = None, linesLeft = None, error = None):
+        self.status = status
+        self.premises = premises
+        self.goal = goal
+        self.lines = lines
+        self.actions = actions
+        self.nodes = nodes
+        self.runtime = runtime
+        self.cost = cost
+        self.cached = cached
+        self.stats = stats                  # the stats.SearchStats of the search, if one was collected
+        self.counterModel = counterModel
+        self.strategy = strategy
+        self.budgetExceeded = budgetExceeded
+        self.partialLines = partialLines
+        self.linesLeft = linesLeft
+        self.error = error
+
+    # Returns a JSON-serializable summary of the result.
+    def toDict(self):
+        record = {
+            "status": self.status,
+            "premises": [premise.text for premise in self.premises],
+            "goal": self.goal.text,
+            "proof": self.actions,
+            "nodes": self.nodes,
+            "runtime": self.runtime,
+            "cost": self.cost,
+            "cached": self.cached,
+        }
+        if self.counterModel is not None:
+            record["counterModel"] = self.counterModel
+        if self.strategy is not None:
+            record["strategy"] = self.strategy
+        if self.stats is not None:
+            record["stats"] = self.stats.toDict()
+        if self.lines is not None:
+            record["lines"] = [[sentence.text, justification, depth] for sentence, justification, depth in self.lines]
+        if self.error is not None:
+            record["error"] = self.error
+        if self.budgetExceeded is not None:
+            record["budgetExceeded"] = self.budgetExceeded
+        if self.partialLines is not None:
+            record["partial"] = {
+                "lines": [[sentence.text, justification, depth] for sentence, justification, depth in self.partialLines],
+                "proof": [actionString(line) for line in self.partialLines],
+                "linesLeft": self.linesLeft,
+            }
+        return record
 
-# Uses a search problem and UCS to find a proof of a goal given premises
-def solveFitchProof(premises, goal):
-    # The first section formats the input into a usable format and extracts symbols
+# Parsed problems by their (premises, goal) text, most recently used last, so that a problem that
+# comes up again isn't parsed again. Holds at most PARSE_CACHE_SIZE problems.
+PARSE_CACHE_SIZE = 4096
+_parsedProblems = collections.OrderedDict()
+
+# Formats the input (premises written as "* p * p => q", and a goal) into formula trees, and extracts
+# the symbol, statement and connective sets the search uses. Connectives can be spelled in any of the
+# ways formula.SPELLINGS lists, and tokens needn't be separated by spaces ("* p=>q * p", "~(p&q)").
+# The sets returned are the caller's own to change. Problems longer than MAX_PROBLEM_TOKENS, or with
+# a sentence nested deeper than MAX_NESTING_DEPTH, raise a ValueError.
+# @return (premises, goal, symbolSet, statementSet, connectiveSet)
+def parseProblem(premises, goal):
+    key = (premises, goal)
+    parsed = _parsedProblems.pop(key, None)
+    if parsed is None:
+        parsed = _parseProblem(premises, goal)
+        if len(_parsedProblems) >= PARSE_CACHE_SIZE:
+            _parsedProblems.popitem(last = False)
+    _parsedProblems[key] = parsed
+    formattedPremises, formattedGoal, symbolSet, statementSet, connectiveSet = parsed
+    return list(formattedPremises), formattedGoal, set(symbolSet), set(statementSet), set(connectiveSet)
+
+# Limits on the problems parseProblem accepts. Every Formula keeps its printed text, so parsing costs
+# memory quadratic in the length of a sentence, and some of the code after parsing (the heuristics,
+# the truth tables, resolution) recurses once per level of nesting.
+MAX_PROBLEM_TOKENS = 4000
+MAX_NESTING_DEPTH = 100
+
+# Connectives the search checks for before trying their rules (see FitchProblem.successorGroups)
+_TRACKED_CONNECTIVES = frozenset([formula.AND, formula.OR, formula.IFF])
+
+def _parseProblem(premises, goal):
+    premiseTokens = [] if premises is None else formula.tokenize(premises)
+    goalTokens = formula.tokenize(goal)
+    if len(premiseTokens) + len(goalTokens) > MAX_PROBLEM_TOKENS:
+        raise ValueError("Problem has more than %d tokens" % MAX_PROBLEM_TOKENS)
     symbolSet = set()
-    # The statement set is used to keep track of full, parenthesized statements
-    statementSet = set()
     connectiveSet = set()
+    for token in premiseTokens + goalTokens:
+        if token in _TRACKED_CONNECTIVES:
+            connectiveSet.add(token)
+        elif token not in formula.SPELLINGS.values():
+            symbolSet.add(formula.atom(token))
 
+    # Each "*" starts a premise (a list without any is a single premise)
     formattedPremises = []
-    if premises != None:
-        premiseSymbols = premises.split()
+    start = 1 if premiseTokens[:1] == ["*"] else 0
+    for position in range(start, len(premiseTokens) + 1 if premiseTokens else 0):
+        if position == len(premiseTokens) or premiseTokens[position] == "*":
+            formattedPremises.append(formula.parseTokens(premiseTokens[start:position], premises,
+                                                         maxDepth = MAX_NESTING_DEPTH))
+            start = position + 1
+
+    # The statement set holds the goal, since we might want to assume its negation, and each of its
+    # parenthesized units
+    units = []
+    formattedGoal = formula.parseTokens(goalTokens, goal, units, MAX_NESTING_DEPTH)
+    statementSet = set(units)
+    statementSet.add(formattedGoal)
+    return (tuple(formattedPremises), formattedGoal, frozenset(symbolSet), frozenset(statementSet),
+            frozenset(connectiveSet))
+
+# Returns the search algorithm findFitchProof runs for an engine, with the given budgets.
+# @param heuristic, weight = override the engine's default heuristic function and weight
+def searchAlgorithm(engine, heuristic = None, weight = None, maxNodes = None, timeLimit = None, stats = None,
+                    maxFrontier = None, cancel = None):
+    if engine == "ucs":
+        algorithm = search.UniformCostSearch(maxNodes = maxNodes, timeLimit = timeLimit, stats = stats,
+                                             maxFrontier = maxFrontier, cancel = cancel)
+    elif engine == "plan":
+        import planner      # planner builds on FitchProblem, so it can only be imported once this module is loaded
+        defaultHeuristic, defaultWeight = ENGINES[engine]
+        algorithm = planner.BackwardPlanner(heuristic or defaultHeuristic, weight or defaultWeight, maxNodes = maxNodes,
+                                            timeLimit = timeLimit, stats = stats, cancel = cancel)
+    elif engine == "refute":
+        import resolution   # Likewise builds on fitch
+        algorithm = resolution.RefutationProver(maxNodes = maxNodes, timeLimit = timeLimit, cancel = cancel)
+    elif engine in MEMORY_BOUNDED_ENGINES:
+        defaultHeuristic, defaultWeight = ENGINES[engine]
+        algorithm = search.IDAStarSearch(heuristic or defaultHeuristic, weight or defaultWeight, maxNodes = maxNodes,
+                                         timeLimit = timeLimit, stats = stats, maxTableSize = maxFrontier or 100000,
+                                         cancel = cancel)
     else:
-        premiseSymbols = []
-    goalSymbols = goal.split()
+        defaultHeuristic, defaultWeight = ENGINES[engine]
+        algorithm = search.AStarSearch(heuristic or defaultHeuristic, weight or defaultWeight,
+                                       maxNodes = maxNodes, timeLimit = timeLimit, stats = stats,
+                                       maxFrontier = maxFrontier, cancel = cancel)
+    return algorithm
+
+# Uses a search problem and UCS (or A*, see ENGINES) to look for a proof of a goal given premises,
+# within optional budgets, and returns a ProofResult.
+#
+# With maxFrontier set, a search whose frontier outgrows it carries on with iterative-deepening A*
+# (search.IDAStarSearch, using the engine's heuristic, or the admissible one for UCS) for the rest of
+# the budgets, remembering at most maxFrontier states, rather than running out of memory.
+# @param engine = "ucs", or one of the names in ENGINES
+# @param heuristic, weight = override the engine's default heuristic function and weight
+# @param maxNodes, timeLimit = stop after expanding this many states / after this many seconds
+# @param cache = a proofcache.ProofCache to look the problem up in first, and to store new proofs in
+# @param stats = a stats.SearchStats to record the search in (rules are labeled by their justification)
+# @param maxFrontier = most states a search may hold in memory (None for no limit)
+# @param costs = the CostProfile to search with (DEFAULT_COSTS if None)
+# @param prune = whether to search from the premises relevant to the goal first (see semantics.relevantPremises)
+# @param cancel = a search.CancellationToken that stops the search with status "cancelled" when raised
+def findFitchProof(premises, goal, engine = "ucs", heuristic = None, weight = None, maxNodes = None, timeLimit = None,
+                   cache = None, stats = None, maxFrontier = None, costs = None, prune = True, cancel = None):
+    if engine != "ucs" and engine not in ENGINES:
+        raise ValueError("Unknown search engine: %s" % engine)
+    startTime = time.time()
+    formattedPremises, formattedGoal, symbolSet, statementSet, connectiveSet = parseProblem(premises, goal)
+
+    # A cached proof is only used if it checks out (the cache is a file anyone can write to); if it
+    # doesn't, the proof found below replaces it
+    if cache is not None:
+        hit = cache.lookup(formattedPremises, formattedGoal)
+        if hit is not None and checker.isValidProof(formattedPremises, formattedGoal, hit[0]):
+            lines, cost = hit
+            return ProofResult("proved", formattedPremises, formattedGoal, lines, [actionString(line) for line in lines],
+                               0, time.time() - startTime, cost, cached = True)
+
+    # Checks the goal actually follows from the premises first: if it doesn't, no proof exists and the
+    # search would never end. Problems with too many symbols for a truth table skip the check.
+    check = semantics.checkEntailment(formattedPremises, formattedGoal)
+    if check is not None and not check.entailed:
+        return ProofResult("invalid", formattedPremises, formattedGoal, runtime = time.time() - startTime,
+                           counterModel = check.counterModel)
+
+    if stats is not None:
+        if stats.label is None:
+            stats.label = ruleOf
+
+    # Searches from only the premises and symbols that can contribute to the goal first, then, if that
+    # search runs out of states to expand with budget to spare, from all of them
+    problems = [(formattedPremises, symbolSet)]
+    if prune:
+        table = None if check is None else check.table
+        relevant = semantics.relevantPremises(formattedPremises, formattedGoal, table)
+        if len(relevant) < len(formattedPremises):
+            relevantSymbols = symbolSet.intersection(semantics.atomsOf(relevant + list(statementSet)))
+            problems.insert(0, (relevant, relevantSymbols))
+
+    # With a budget to run out, ranks unfinished proofs by how much of the goal they've built, not
+    # just by the lower bound. That costs a heuristic call per expansion, so searches that can only
+    # end in a proof or with no states left don't pay it.
+    progress = None
+    if maxNodes is not None or timeLimit is not None or cancel is not None:
+        progress = heuristics.fastHeuristic
+
+    nodes = 0
+    unfinished = []             # (problem, most promising state) of each search
+    for problemPremises, problemSymbols in problems:
+        remainingNodes = None if maxNodes is None else maxNodes - nodes
+        remainingTime = None if timeLimit is None else max(0, timeLimit - (time.time() - startTime))
+        problem = FitchProblem(problemPremises, formattedGoal, problemSymbols, statementSet, connectiveSet)
+        if costs is not None:
+            problem.costs = costs
+        if check is not None:
+            # The pieces of the problem (and their negations) that the premises alone entail
+            candidates = set()
+            for sentence in list(problemPremises) + list(statementSet):
+                candidates.update(sentence.subformulas())
+            candidates.update([formula.negation(candidate) for candidate in candidates])
+            models = check.table.models(problemPremises)
+            problem.entailed = semantics.EntailmentCheck(check.table, models, True, None).consequences(candidates)
+        problem.stats = stats
+        algorithm = searchAlgorithm(engine, heuristic, weight, remainingNodes, remainingTime, stats, maxFrontier,
+                                    cancel)
+        if engine not in ("plan", "refute"):
+            algorithm.progress = progress
+        algorithm.solve(problem)
+        nodes += algorithm.numStatesExplored
+        unfinished.append((problem, algorithm.bestState))
 
-    currPremise = 0     # The number of premises added to the list so far
-    currUnit = ""       # The formatted premise so far
+        # Out of memory: carries on in bounded memory with whatever budget is left
+        if algorithm.status == "memory":
+            if engine == "ucs":
+                fallbackHeuristic, fallbackWeight = heuristics.goalStructureHeuristic, 1
+            else:
+                fallbackHeuristic, fallbackWeight = heuristic or ENGINES[engine][0], weight or ENGINES[engine][1]
+            remainingNodes = None if maxNodes is None else maxNodes - nodes
+            remainingTime = None if timeLimit is None else max(0, timeLimit - (time.time() - startTime))
+            algorithm = search.IDAStarSearch(fallbackHeuristic, fallbackWeight, maxNodes = remainingNodes,
+                                             timeLimit = remainingTime, stats = stats, maxTableSize = maxFrontier,
+                                             cancel = cancel, progress = progress)
+            algorithm.solve(problem)
+            nodes += algorithm.numStatesExplored
+            unfinished.append((problem, algorithm.bestState))
 
-    inParens = False    # Keeps track of whether inside parentheses
-    parensDepth = 0     # Depth of parentheses
-    currParenUnit = ""  # The parenthesized unit made so far
+        if algorithm.status != "exhausted" or (maxNodes is not None and nodes >= maxNodes):
+            break
 
-    for symbol in premiseSymbols:
-        if symbol == "*":
-            if currPremise == 0:
-                currPremise += 1
+    lines = None
+    actions = algorithm.actions
+    if algorithm.endState is not None:
+        lines = [line for line in algorithm.endState.lines() if line[1] != "Premise"]
+        # One action per line, even where a step wrote several (see SubproofMemo)
+        actions = [actionString(line) for line in lines]
+        if cache is not None:
+            cache.store(formattedPremises, formattedGoal, lines, algorithm.totalCost)
+
+    # Without a proof, reports which budget stopped the search, and the unfinished proof of any of
+    # the searches that builds the most of the goal (with the admissible estimate of what's left)
+    budgetExceeded = None
+    partialLines = None
+    linesLeft = None
+    if algorithm.status != "proved":
+        if algorithm.status == "timeout":
+            budgetExceeded = "time"
+        elif algorithm.status == "cancelled":
+            budgetExceeded = "cancelled"
+        elif maxNodes is not None and nodes >= maxNodes:
+            budgetExceeded = "nodes"
+        bestProgress = None
+        for problem, state in unfinished:
+            if state is None:
                 continue
-            formattedPremises.append(currUnit)
-            currPremise += 1
-            currUnit = ""
-
-        elif symbol == "(":
-            parensDepth += 1
-            inParens = True
-            currUnit += "("
-        elif symbol == ")":
-            parensDepth -= 1
-            if parensDepth == 0: inParens = False
-            currUnit += ")"
-            currParenUnit = ""
-
-        elif symbol == "AND" or symbol == "and" or symbol == "&&" or symbol == "&":
-            currUnit += " && "
-            connectiveSet.add("&&")
-            if inParens: currParenUnit += " && "
-        elif symbol == "OR" or symbol == "or" or symbol == "||" or symbol == "|":
-            currUnit += " || "
-            connectiveSet.add("||")
-            if inParens: currParenUnit += " || "
-        elif symbol == "NOT" or symbol == "not" or symbol == "~":
-            currUnit += "~"
-            if inParens: currParenUnit += "~"
-        elif symbol == "=>" or symbol == "->":
-            currUnit += " -> "
-            if inParens: currParenUnit += " -> "
-        elif symbol == "<=>" or symbol == "<->":
-            currUnit += " <-> "
-            connectiveSet.add("<->")
-            if inParens: currParenUnit += " <-> "
+            progress = heuristics.fastHeuristic(problem, state)
+            if bestProgress is None or progress < bestProgress:
+                bestProgress = progress
+                linesLeft = heuristics.goalStructureHeuristic(problem, state)
+                partialLines = [line for line in state.lines() if line[1] != "Premise"]
+    return ProofResult(algorithm.status, formattedPremises, formattedGoal, lines, actions,
+                       nodes, time.time() - startTime, algorithm.totalCost, stats = stats,
+                       budgetExceeded = budgetExceeded, partialLines = partialLines, linesLeft = linesLeft)
 
-        else:
-            currUnit += symbol
-            if inParens: currParenUnit += symbol
-            symbolSet.add(symbol)
-
-    # One and a half loops (less than a half, actually)
-    if premises != None:
-        formattedPremises.append(currUnit)
-
-    currUnit = ""
-    for symbol in goalSymbols:
-        if symbol == "(":
-            parensDepth += 1
-            inParens = True
-            currUnit += "("
-        elif symbol == ")":
-            parensDepth -= 1
-            if parensDepth == 0: inParens = False
-            currUnit += ")"
-            currParenUnit = ""
-
-        elif symbol == "AND" or symbol == "and" or symbol == "&&" or symbol == "&":
-            currUnit += " && "
-            connectiveSet.add("&&")
-            if inParens: currParenUnit += " && "
-        elif symbol == "OR" or symbol == "or" or symbol == "||" or symbol == "|":
-            currUnit += " || "
-            connectiveSet.add("||")
-            if inParens: currParenUnit += " || "
-        elif symbol == "NOT" or symbol == "not" or symbol == "~":
-            currUnit += "~"
-            if inParens: currParenUnit += "~"
-        elif symbol == "=>" or symbol == "->":
-            currUnit += " -> "
-            if inParens: currParenUnit += " -> "
-        elif symbol == "<=>" or symbol == "<->":
-            currUnit += " <-> "
-            connectiveSet.add("<->")
-            if inParens: currParenUnit += " <-> "
+# Looks for proofs of several goals from the same premises with one shared search, and returns a
+# ProofResult per goal, in order.
+#
+# The search ends at whichever goal it proves first (at depth 0), and carries on from that proof for
+# the rest: everything derived on the way, and the goals already proved, stay in scope as lemmas, so
+# the work of drawing conclusions from the premises is only done once. The proof of each goal is
+# the whole proof up to it, including the proofs of the goals found before it; nodes, runtime and
+# cost are likewise counted from the start. Goals the premises don't entail are "invalid" at once.
+# @param goals = list of goals, written as for findFitchProof
+# @param engine = "ucs", or an engine in ENGINES that searches forward ("astar", "fast" or "ida")
+# @param maxNodes, timeLimit = budgets for the whole search; goals left when they run out get its status
+# (the other parameters are as in findFitchProof)
+def findFitchProofs(premises, goals, engine = "ucs", heuristic = None, weight = None, maxNodes = None,
+                    timeLimit = None, stats = None, costs = None):
+    if engine in ("plan", "refute") or (engine != "ucs" and engine not in ENGINES):
+        raise ValueError("Search engine %s can't prove several goals at once" % engine)
+    startTime = time.time()
+    results = [None] * len(goals)
+    if not goals:
+        return results
 
-        else:
-            currUnit += symbol
-            if inParens: currParenUnit += symbol
-            symbolSet.add(symbol)
+    # Parses each goal with the premises, and searches over all of their symbols. The statements of a
+    # goal guide which assumptions are made, so only those of the goals still to be proved are used.
+    formattedPremises = None
+    formattedGoals = []
+    statementSets = {}          # Goal -> its statement set
+    symbolSet, connectiveSet = set(), set()
+    for goal in goals:
+        formattedPremises, formattedGoal, symbols, statements, connectives = parseProblem(premises, goal)
+        formattedGoals.append(formattedGoal)
+        statementSets[formattedGoal] = statements
+        symbolSet.update(symbols)
+        connectiveSet.update(connectives)
+    statementSet = set().union(*statementSets.values())
 
-    formattedGoal = currUnit
-    
-    # Adds the goal to the statement set, since we might want to assume its negation.
-    statementSet.add(formattedGoal)
+    remaining = {}              # Goal -> positions of the goal in the list
+    entailed = None
+    for position, goal in enumerate(formattedGoals):
+        check = semantics.checkEntailment(formattedPremises, goal)
+        if check is not None and not check.entailed:
+            results[position] = ProofResult("invalid", formattedPremises, goal, runtime = time.time() - startTime,
+                                            counterModel = check.counterModel)
+            continue
+        remaining.setdefault(goal, []).append(position)
 
-    # Breaks the formatted goal into its parenthesized units and adds each of them to statementSet.
-    def genParenUnits(formattedGoal):
-        units = []
-        stack = []
-        for i, c in enumerate(formattedGoal):
-            if c == "(":
-                stack.append(i)
-            elif c == ")" and stack:
-                start = stack.pop()
-                units.append(formattedGoal[start + 1 : i])
-        return units
-
-    units = genParenUnits(formattedGoal)
-    for unit in units:
-        if unit == "": continue
-        statementSet.add(unit)
-
-    # Prints the set of "meaningful statements" from the goal (for testing)
-    # print statementSet
-
-    # Prints the processed versions of the premises and goal (for testing)
-    '''
-    for premise in formattedPremises:
-        print "Premise: ", premise
-    print "Goal: ", formattedGoal
-    '''
+    # The pieces of the problems (and their negations) that the premises alone entail, from a truth
+    # table over every goal's symbols
+    table = semantics.tableFor(list(formattedPremises) + list(statementSet))
+    if table is not None:
+        candidates = set()
+        for sentence in list(formattedPremises) + list(statementSet):
+            candidates.update(sentence.subformulas())
+        candidates.update([formula.negation(candidate) for candidate in candidates])
+        entailed = semantics.EntailmentCheck(table, table.models(formattedPremises), True, None).consequences(candidates)
 
-    # Solve the search problem with UCS
-    ucs = util.UniformCostSearch(verbose = 0)
-    ucs.solve(FitchProblem(formattedPremises, formattedGoal, symbolSet, statementSet, connectiveSet))
-    proof = ucs.actions
+    if engine != "ucs":
+        heuristic = nearestGoalHeuristic(heuristic or ENGINES[engine][0])
+    if stats is not None and stats.label is None:
+        stats.label = ruleOf
+    state = FitchProblem(formattedPremises, None, symbolSet, set(), connectiveSet).startState()
+    nodes = 0
+    totalCost = 0
+    # Each search starts over from the last one's proof, so subproofs written in the branches it
+    # didn't take are remembered for the searches after it
+    memo = SubproofMemo(frozenset(piece for sentence in list(formattedPremises) + list(statementSet)
+                                  for piece in sentence.subformulas() if piece.isImplication()))
+    while remaining:
+        remainingNodes = None if maxNodes is None else maxNodes - nodes
+        remainingTime = None if timeLimit is None else max(0, timeLimit - (time.time() - startTime))
+        statements = set().union(*[statementSets[goal] for goal in remaining])
+        problem = MultiGoalProblem(formattedPremises, remaining, symbolSet, statements, connectiveSet, state)
+        problem.entailed = entailed
+        problem.stats = stats
+        if costs is not None:
+            problem.costs = costs
+        problem.memo = memo
+        algorithm = searchAlgorithm(engine, heuristic, weight, remainingNodes, remainingTime, stats)
+        algorithm.solve(problem)
+        nodes += algorithm.numStatesExplored
+        if algorithm.status != "proved":
+            for goal, positions in remaining.items():
+                for position in positions:
+                    results[position] = ProofResult(algorithm.status, formattedPremises, goal, nodes = nodes,
+                                                    runtime = time.time() - startTime, stats = stats)
+            break
+
+        # The next search starts from this proof, so the goal is a lemma for the rest
+        state = algorithm.endState
+        totalCost += algorithm.totalCost
+        goal = state.line[0]
+        lines = [line for line in state.lines() if line[1] != "Premise"]
+        for position in remaining.pop(goal):
+            results[position] = ProofResult("proved", formattedPremises, goal, lines,
+                                            [actionString(line) for line in lines], nodes,
+                                            time.time() - startTime, totalCost, stats = stats)
+    return results
+
+# Finds and prints a proof of a goal given premises (see findFitchProof for the options, including the
+# budgets: if one runs out, the most promising unfinished proof is printed instead)
+# If stats is given, its report is printed after the proof.
+# @param race = a list of portfolio strategies to race against each other on every core instead of
+#   running the one engine, or True for portfolio.PORTFOLIO (see portfolio.findPortfolioProof); stats
+#   aren't collected for a race, and the budgets are each strategy's
+# @param costs = the CostProfile to search with, or the path of one saved by tuning.py (see loadCostProfile);
+#   a race uses its strategies' own
+# @return the list of proof steps, or None if no proof was found
+def solveFitchProof(premises, goal, engine = "ucs", heuristic = None, weight = None, cache = None, stats = None,
+                    race = None, maxNodes = None, timeLimit = None, maxFrontier = None, cancel = None, costs = None):
+    if isinstance(costs, basestring):
+        costs = loadCostProfile(costs)
+    if race:
+        import portfolio    # Runs findFitchProof in its workers
+        strategies = portfolio.PORTFOLIO if race is True else race
+        result = portfolio.findPortfolioProof(premises, goal, strategies, maxNodes = maxNodes, timeLimit = timeLimit,
+                                              cache = cache)
+        proof = printProof(result)
+        if result.strategy is not None:
+            print "Found by strategy: %s" % result.strategy
+        return proof
+    result = findFitchProof(premises, goal, engine, heuristic, weight, maxNodes, timeLimit, cache, stats, maxFrontier,
+                            costs, cancel = cancel)
+    proof = printProof(result)
+    if stats is not None:
+        print stats.report()
+    return proof
+
+# Finds and prints proofs of several goals given the same premises (see findFitchProofs)
+# @return the list of proof steps for each goal (None for goals not proved)
+def solveFitchProofs(premises, goals, engine = "ucs", heuristic = None, weight = None, stats = None):
+    results = findFitchProofs(premises, goals, engine, heuristic, weight, stats = stats)
+    proofs = []
+    for result in results:
+        print "Goal: %s" % result.goal
+        proofs.append(printProof(result))
+        print ""
+    if stats is not None:
+        print stats.report()
+    return proofs
+
+# Prints the premises and proof steps of a ProofResult
+# @return the list of proof steps, or None if no proof was found
+def printProof(result):
+    proof = result.actions
 
     # Prints the premises, which do not appear in the solved proof's actions.
-    for premise in formattedPremises:
+    for premise in result.premises:
         print "Premise: ", premise
 
     # Prints the proof, step by step.
+    if result.status == "invalid":
+        print "No proof exists: the premises don't entail the goal. Counter-model: %s" % ", ".join(
+            "%s = %s" % (name, result.counterModel[name]) for name in sorted(result.counterModel))
+        return proof
+    if result.status == "rejected":
+        print "No proof found: %s" % result.error
+        return None
+    if proof is None:
+        if result.budgetExceeded is None:
+            print "No proof found."
+        else:
+            reasons = {"time": "ran out of time", "nodes": "ran out of nodes", "cancelled": "was cancelled"}
+            print "No proof found: the search %s." % reasons[result.budgetExceeded]
+        if result.partialLines:
+            print "Most promising unfinished proof (at least %d more lines):" % result.linesLeft
+            for line in result.partialLines:
+                print actionString(line)
+        return proof
     for step in proof:
         print step
     
@@ -0,0 +1,305 @@
+######################################################
+# File: formula.py                                   #
+# Author: Dan McFalls (dmcfalls@stanford.edu)        #
+# Project: Fitch Proof Automation with State-Search  #
+# Final Project for CS221: Artificial Intelligence   #
+######################################################
+
+import re
+
+###################
+#   Connectives   #
+###################
+
+ATOM = "atom"
+NOT = "~"
+AND = "&&"
+OR = "||"
+IMPLIES = "->"
+IFF = "<->"
+
+# Binding strength of each connective, from loosest to tightest.
+# Implications (and biconditionals) bind loosest, so "p && q -> r" is "(p && q) -> r".
+PRECEDENCE = {IFF: 0, IMPLIES: 1, OR: 2, AND: 3, NOT: 4, ATOM: 5}
+
+#########################
+#   Interned Formulas   #
+#########################
+
+# Every distinct formula is represented by exactly one Formula object, so formulas can be compared
+# with "is"/"==" (identity) and hashed in constant time. The printed form, hash, and children of a
+# formula are computed once, when the node is first built.
+_table = {}
+
+class Formula(object):
+    __slots__ = ('op', 'children', 'name', 'text', 'hash', 'id', 'cachedSubformulas')
+
+    def __init__(self, op, children, name):
+        self.op = op                # One of the connective constants above
+        self.children = children    # Tuple of child Formulas (empty for atoms)
+        self.name = name            # Symbol name for atoms, None otherwise
+        self.text = _render(op, children, name)
+        self.hash = hash(self.text)
+        self.id = len(_table)       # Serial number, unique per process
+        self.cachedSubformulas = None
+
+    def __hash__(self):
+        return self.hash
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return "Formula(%r)" % self.text
+
+    # Formulas are rebuilt through the interning table when unpickled (e.g. in worker processes).
+    def __reduce__(self):
+        return (parse, (self.text,))
+
+    # Returns the frozenset of every subformula of this formula, including itself.
+    def subformulas(self):
+        if self.cachedSubformulas is None:
+            # Fills in the children's sets first, without recursing.
+            pending = [self]
+            while pending:
+                node = pending[-1]
+                missing = [child for child in node.children if child.cachedSubformulas is None]
+                if missing:
+                    pending.extend(missing)
+                    continue
+                pending.pop()
+                subformulas = set((node,))
+                for child in node.children:
+                    subformulas.update(child.cachedSubformulas)
+                node.cachedSubformulas = frozenset(subformulas)
+        return self.cachedSubformulas
+
+    def isAtom(self):
+        return self.op == ATOM
+
+    def isNegation(self):
+        return self.op == NOT
+
+    def isConjunction(self):
+        return self.op == AND
+
+    def isDisjunction(self):
+        return self.op == OR
+
+    def isImplication(self):
+        return self.op == IMPLIES
+
+    def isBiconditional(self):
+        return self.op == IFF
+
+# Wraps a child's printed form in parentheses if it binds looser than its parent requires.
+def _wrap(child, minPrecedence):
+    if PRECEDENCE[child.op] < minPrecedence:
+        return "(" + child.text + ")"
+    return child.text
+
+# Builds the printed form of a node from the (already printed) forms of its children.
+def _render(op, children, name):
+    if op == ATOM:
+        return name
+    if op == NOT:
+        return "~" + _wrap(children[0], PRECEDENCE[NOT])
+    if op == AND or op == OR:
+        return (" " + op + " ").join(_wrap(child, PRECEDENCE[op]) for child in children)
+    # Implications and biconditionals associate to the right, so only the left side needs
+    # parentheses when it has the same connective.
+    lhs = _wrap(children[0], PRECEDENCE[op] + 1)
+    rhs = _wrap(children[1], PRECEDENCE[op])
+    return lhs + " " + op + " " + rhs
+
+# Returns the unique Formula for the given connective and children, creating it if needed.
+def _intern(op, children, name = None):
+    key = (op, children, name)
+    node = _table.get(key)
+    if node is None:
+        node = Formula(op, children, name)
+        _table[key] = node
+    return node
+
+def atom(name):
+    return _intern(ATOM, (), name)
+
+def negation(phi):
+    return _intern(NOT, (phi,))
+
+# Conjunctions and disjunctions are kept flat, so "(p && q) && r" and "p && (q && r)" are the
+# same node as "p && q && r".
+def _flatten(op, operands):
+    children = []
+    for operand in operands:
+        if operand.op == op:
+            children.extend(operand.children)
+        else:
+            children.append(operand)
+    return tuple(children)
+
+def conjunction(*conjuncts):
+    return _intern(AND, _flatten(AND, conjuncts))
+
+def disjunction(*disjuncts):
+    return _intern(OR, _flatten(OR, disjuncts))
+
+def implication(antecedent, consequent):
+    return _intern(IMPLIES, (antecedent, consequent))
+
+def biconditional(lhs, rhs):
+    return _intern(IFF, (lhs, rhs))
+
+#####################
+#   Substitutions   #
+#####################
+
+# Returns phi with its atoms replaced according to a mapping from atoms to formulas. Atoms missing
+# from the mapping are left alone.
+def substitute(phi, mapping, memo = None):
+    if memo is None: memo = {}
+    if phi in memo:
+        return memo[phi]
+    if phi.isAtom():
+        result = mapping.get(phi, phi)
+    else:
+        children = [substitute(child, mapping, memo) for child in phi.children]
+        if phi.isNegation():
+            result = negation(children[0])
+        elif phi.isConjunction():
+            result = conjunction(*children)
+        elif phi.isDisjunction():
+            result = disjunction(*children)
+        elif phi.isImplication():
+            result = implication(children[0], children[1])
+        else:
+            result = biconditional(children[0], children[1])
+    memo[phi] = result
+    return result
+
+# Returns a renaming of the atoms in the given formulas to s0, s1, s2... in order of first appearance
+# (reading the formulas in order, left to right). Problems that differ only in their choice of
+# symbol names have the same formulas after renaming.
+def canonicalRenaming(formulas):
+    renaming = {}
+    for phi in formulas:
+        pending = [phi]
+        while pending:
+            node = pending.pop()
+            if node.isAtom():
+                if node not in renaming:
+                    renaming[node] = atom("s%d" % len(renaming))
+            else:
+                pending.extend(reversed(node.children))
+    return renaming
+
+###############
+#   Parsing   #
+###############
+
+# Every spelling of a connective accepted in input, and the connective it stands for. Formulas print
+# with the symbolic spellings, so the printed form of a formula parses back to the same formula.
+SPELLINGS = {
+    "~": NOT, "NOT": NOT, "not": NOT,
+    "&&": AND, "&": AND, "AND": AND, "and": AND,
+    "||": OR, "|": OR, "OR": OR, "or": OR,
+    "->": IMPLIES, "=>": IMPLIES,
+    "<->": IFF, "<=>": IFF,
+    "(": "(", ")": ")",
+    "*": "*",           # Starts a premise, in lists of premises (see fitch.parseProblem)
+}
+
+# A token is a symbolic connective, a parenthesis, a star, or a run of any other characters, which
+# is a word connective if SPELLINGS has it and a symbol otherwise; anything else in the input (a
+# stray "<", "=" or "-") matches the second group. Tokens needn't be separated by spaces.
+_TOKEN = re.compile(r"(<->|<=>|->|=>|&&|\|\||[~&|()*]|[^\s~&|()*<>=-]+)|(\S)")
+
+# Splits text into tokens, with each connective spelled the way formulas print it ("=>" is "->",
+# "AND" is "&&" and so on). Parentheses and stars are left as they are, and symbols are their names.
+def tokenize(text):
+    tokens = []
+    for token, unexpected in _TOKEN.findall(text):
+        if unexpected:
+            raise ValueError("Unexpected character %r in formula: %r" % (unexpected, text))
+        tokens.append(SPELLINGS.get(token, token))
+    return tokens
+
+# Parses a sentence (e.g. "(p -> q) -> ~r", or "( p => q ) => NOT r") and returns its interned Formula.
+def parse(text):
+    return parseTokens(tokenize(text), text)
+
+_BINARY = {IFF: biconditional, IMPLIES: implication, OR: disjunction, AND: conjunction}
+
+# Parses a list of tokens from tokenize into a Formula.
+#
+# Works with explicit stacks of operands and pending connectives (the shunting-yard algorithm), so
+# deeply nested input can't overflow the Python stack. A binary connective first applies every
+# pending connective that binds more tightly than it, or as tightly for the left-associative ones;
+# implications and biconditionals associate to the right.
+# @param text = the text the tokens came from, for error messages
+# @param units = a list to append the formula inside each pair of parentheses to, if given
+# @param maxDepth = most connectives the formula may nest inside each other (None for no limit); deeper
+#   input raises a ValueError before it's built, since every node stores its printed text
+def parseTokens(tokens, text = None, units = None, maxDepth = None):
+    if not tokens:
+        raise ValueError("Empty formula: %r" % text)
+    operands = []
+    depths = []             # Nesting depth of each operand
+    pending = []            # Connectives and open parentheses not yet applied
+    expectOperand = True
+    for token in tokens:
+        if expectOperand:
+            if token == NOT or token == "(":
+                pending.append(token)
+            elif token in _BINARY or token == ")" or token == "*":
+                raise ValueError("Unexpected token %r in formula: %r" % (token, text))
+            else:
+                operands.append(atom(token))
+                depths.append(0)
+                expectOperand = False
+        elif token == ")":
+            while pending and pending[-1] != "(":
+                _apply(pending.pop(), operands, depths, maxDepth, text)
+            if not pending:
+                raise ValueError("Unbalanced parentheses in formula: %r" % text)
+            pending.pop()
+            if units is not None:
+                units.append(operands[-1])
+        elif token in _BINARY:
+            precedence = PRECEDENCE[token]
+            rightAssociative = token == IMPLIES or token == IFF
+            while pending and pending[-1] != "(":
+                top = PRECEDENCE[pending[-1]]
+                if top < precedence or (top == precedence and rightAssociative):
+                    break
+                _apply(pending.pop(), operands, depths, maxDepth, text)
+            pending.append(token)
+            expectOperand = True
+        else:
+            raise ValueError("Unexpected token %r in formula: %r" % (token, text))
+    if expectOperand:
+        raise ValueError("Formula ended unexpectedly: %r" % text)
+    while pending:
+        if pending[-1] == "(":
+            raise ValueError("Unbalanced parentheses in formula: %r" % text)
+        _apply(pending.pop(), operands, depths, maxDepth, text)
+    return operands[0]
+
+# Applies a connective to the operands on top of the stack.
+def _apply(op, operands, depths, maxDepth = None, text = None):
+    if op == NOT:
+        phi = negation(operands.pop())
+        depth = depths.pop() + 1
+    else:
+        rhs, rhsDepth = operands.pop(), depths.pop()
+        lhs, lhsDepth = operands.pop(), depths.pop()
+        phi = _BINARY[op](lhs, rhs)
+        if phi.op == AND or phi.op == OR:
+            # Conjunctions and disjunctions are kept flat, so a chain of them is only one level deep
+            depth = max(lhsDepth + (lhs.op != phi.op), rhsDepth + (rhs.op != phi.op))
+        else:
+            depth = max(lhsDepth, rhsDepth) + 1
+    if maxDepth is not None and depth > maxDepth:
+        raise ValueError("Formula nested more than %d connectives deep: %.80r" % (maxDepth, text))
+    operands.append(phi)
+    depths.append(depth)
@@ -0,0 +1,115 @@
+######################################################
+# File: heuristics.py                                #
+# Author: Dan McFalls (dmcfalls@stanford.edu)        #
+# Project: Fitch Proof Automation with State-Search  #
+# Final Project for CS221: Artificial Intelligence   #
+######################################################
+
+import formula
+
+# Heuristics for search.AStarSearch on a fitch.FitchProblem. Each one is a function
+# heuristic(problem, state) returning an estimate of the cost still needed to finish the proof.
+#
+# The estimates count proof lines other than assumptions. Every rule except Assumption costs at
+# least 1 in FitchProblem, so a lower bound on the number of such lines is an admissible heuristic.
+
+# Lines needed to produce a formula that no rule can pull out of the sentences in scope: some
+# intermediate formula containing it has to be built first (e.g. an implication via a subproof),
+# then eliminated.
+UNREACHABLE_LINES = 3
+
+# Returns True if phi might be derivable in one step by an elimination rule, i.e. it appears inside
+# something in scope (or is one direction of a biconditional that does).
+def _extractable(phi, sentences):
+    for sentence in sentences:
+        if phi in sentence.subformulas():
+            return True
+    if phi.isImplication():
+        lhs, rhs = phi.children
+        forward = formula.biconditional(lhs, rhs)
+        backward = formula.biconditional(rhs, lhs)
+        for sentence in sentences:
+            subformulas = sentence.subformulas()
+            if forward in subformulas or backward in subformulas:
+                return True
+    return False
+
+# Returns a lower bound on the number of non-assumption lines needed before phi appears in a scope
+# holding the given sentences, or limit if that's lower. The bound never goes past UNREACHABLE_LINES,
+# so the recursion only goes as deep as it takes to reach that, however deeply phi is nested.
+# @param entailed = for a scope at level 0, the formulas true in every model of the premises (see
+#   FitchProblem.entailed), covering phi's subformulas; None if unknown
+def linesNeeded(phi, sentences, entailed = None, limit = UNREACHABLE_LINES):
+    if phi in sentences:
+        return 0
+    if _extractable(phi, sentences):
+        return 1
+    if limit <= 1:
+        return limit
+    return min(limit, _introductionLines(phi, sentences, entailed, limit))
+
+# Lower bound on the lines needed to build phi with the introduction rule for its main connective.
+# That rule is one line, so its premises only count up to limit - 1.
+def _introductionLines(phi, sentences, entailed, limit):
+    if phi.isConjunction():
+        return 1 + sum(linesNeeded(conjunct, sentences, entailed, limit - 1) for conjunct in set(phi.children))
+    if phi.isDisjunction():
+        # At level 0, only a disjunct the premises entail can ever be written down to introduce from
+        disjuncts = phi.children
+        if entailed is not None:
+            disjuncts = [disjunct for disjunct in disjuncts if disjunct in entailed]
+            if not disjuncts:
+                return UNREACHABLE_LINES
+        return 1 + min(linesNeeded(disjunct, sentences, entailed, limit - 1) for disjunct in disjuncts)
+    if phi.isImplication():
+        # A subproof assuming the antecedent, whose body has to contain the consequent
+        antecedent, consequent = phi.children
+        return 1 + max(1, linesNeeded(consequent, sentences.union((antecedent,)), limit = limit - 1))
+    if phi.isBiconditional():
+        lhs, rhs = phi.children
+        return (1 + linesNeeded(formula.implication(lhs, rhs), sentences, entailed, limit - 1)
+                  + linesNeeded(formula.implication(rhs, lhs), sentences, entailed, limit - 1))
+    if phi.isNegation():
+        return 1
+    # Atoms have no introduction rule
+    return UNREACHABLE_LINES
+
+# Admissible: the minimum number of rule applications still needed to build the goal's connective
+# structure from the sentences in scope.
+#   * Inside a subproof, every open level needs its own Implication Introduction to close, and the
+#     last one only yields the goal if the goal is an implication from the outermost assumption.
+#   * At level 0, the goal has to be written (reiterated, if it's already in scope) and, unless it
+#     can be extracted from something in scope, built from parts that each need lines of their own.
+#   * Depths are counted from the level the search started at (see FitchProblem.subproblem).
+def goalStructureHeuristic(problem, state):
+    if problem.isEnd(state):
+        return 0
+    index = state.index()
+    goal = problem.goal
+    depth = index.depth - problem.baseDepth
+    if depth == 0:
+        if goal in index.sentences:
+            return 1
+        return linesNeeded(goal, index.sentences, problem.entailed if index.depth == 0 else None)
+
+    outermost = index
+    while outermost.depth > problem.baseDepth + 1:
+        outermost = outermost.outer
+    if not goal.isImplication() or goal.children[0] != outermost.assumption:
+        return depth + 1
+    consequent = goal.children[1]
+    if depth == 1 and not index.inBody(consequent):
+        return 1 + max(1, linesNeeded(consequent, index.sentences))
+    return depth
+
+# Inadmissible, for use with a weight above 1: adds the number of pieces of the goal that aren't in
+# scope yet to the admissible estimate, so states that have built more of the goal come first.
+def fastHeuristic(problem, state):
+    if problem.isEnd(state):
+        return 0
+    sentences = state.index().sentences
+    missing = 0
+    for subformula in problem.goal.subformulas():
+        if not subformula.isAtom() and subformula not in sentences:
+            missing += 1
+    return goalStructureHeuristic(problem, state) + missing
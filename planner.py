@@ -0,0 +1,224 @@
+######################################################
+# File: planner.py                                   #
+# Author: Dan McFalls (dmcfalls@stanford.edu)        #
+# Project: Fitch Proof Automation with State-Search  #
+# Final Project for CS221: Artificial Intelligence   #
+######################################################
+
+import time
+import util
+import formula
+import search
+import semantics
+import fitch
+
+# Goal-directed proof planning. Rather than searching forward for the whole goal, the planner works
+# backwards from the goal's main connective with the matching introduction rule, and only searches
+# for what's left over:
+#   * phi -> psi:   assume phi, prove psi in the subproof, then Implication Introduction
+#   * phi <-> psi:  prove phi -> psi and psi -> phi, then Biconditional Introduction
+#   * phi && psi:   prove each conjunct, then And Introduction
+#   * phi || psi:   prove whichever disjunct the scope entails, then Or Introduction
+#   * ~phi:         assume phi and search for a contradiction psi, ~psi; then phi -> psi and
+#                   phi -> ~psi by Implication Introduction, and Negation Introduction
+# Anything else (atoms, and any subgoal the decomposition fails on) is first tried by cases: for a
+# disjunction in scope (or one Implication Elimination away), prove phi from each disjunct, then Or
+# Elimination. Failing that, it's proved by a small forward search from the scope the planner has
+# built so far (FitchProblem.subproblem). The pieces are written into a single proof as they're found.
+#
+# Truth tables (see semantics.py) keep the planner from trying subgoals that the sentences in scope
+# don't entail, which would otherwise use up the whole budget searching for a proof that isn't there.
+#
+# Each forward search only has to reach one piece of the goal, inside exactly the subproofs it needs,
+# so nested implications cost a search per piece instead of one search over every way of opening
+# the subproofs.
+
+# A forward search for a contradiction inside the subproof the start state is in: it ends once the
+# body of that subproof holds some sentence and its negation.
+class ContradictionProblem(fitch.FitchProblem):
+    def isEnd(self, state):
+        if state.depth != self.baseDepth:
+            return False
+        return findContradiction(state.index()) is not None
+
+# Returns a sentence psi such that psi and ~psi are both lines of the current subproof, or None.
+def findContradiction(index):
+    for sentence in index.body:
+        if index.inBody(formula.negation(sentence)):
+            return sentence
+    return None
+
+# Plans a proof for a fitch.FitchProblem, with the same interface and results as search.AStarSearch.
+# numStatesExplored adds up every forward search, and the budgets are shared between all of them.
+# The searches use different costs for their pieces, so totalCost is just the number of lines written.
+# If a budget runs out, bestState is the best state of the forward search it ran out in, which
+# extends the lines the planner had written by then.
+class BackwardPlanner(util.SearchAlgorithm):
+    # @param heuristic, weight = heuristic and weight for the forward searches, as in search.AStarSearch
+    def __init__(self, heuristic = search.nullHeuristic, weight = 1, verbose = 0, maxNodes = None, timeLimit = None,
+                 stats = None, cancel = None):
+        self.heuristic = heuristic
+        self.weight = weight
+        self.verbose = verbose
+        self.maxNodes = maxNodes
+        self.timeLimit = timeLimit
+        self.stats = stats
+        self.cancel = cancel
+
+    def solve(self, problem):
+        self.actions = None
+        self.totalCost = None
+        self.numStatesExplored = 0
+        self.endState = None
+        self.bestState = None
+        self.status = "exhausted"
+        self.deadline = None if self.timeLimit is None else time.time() + self.timeLimit
+        self.table = semantics.tableFor(list(problem.premises) + list(problem.statementSet), problem.symbols)
+
+        startState = problem.startState()
+        try:
+            state = self._establish(problem, startState, problem.goal)
+        except search.OutOfBudget as stop:
+            self.status = stop.status
+            state = None
+        if state is None:
+            if self.verbose >= 1:
+                print "No plan found"
+            return
+
+        # The goal has to be the last line, and not just a premise
+        if not problem.isEnd(state):
+            state = self._write(state, problem.goal, "R")
+        self.status = "proved"
+        self.endState = state
+        self.actions = [fitch.actionString(line) for line in state.lines()[startState.length:]]
+        self.totalCost = len(self.actions)
+        if self.verbose >= 1:
+            print "numStatesExplored = %d" % self.numStatesExplored
+            print "totalCost = %s" % self.totalCost
+            print "actions = %s" % self.actions
+
+    # Appends a line written by the planner itself.
+    def _write(self, state, sentence, justification, depth = None):
+        return state.extend(sentence, justification, depth)
+
+    # Returns True unless the truth table shows phi doesn't follow from the sentences (and so can't
+    # be proved from them).
+    def _entails(self, sentences, phi):
+        return self.table is None or self.table.entails(sentences, phi)
+
+    # Returns a state extending the given one in which phi is in scope, written as a line of the
+    # current subproof if there is one (so that Implication Introduction can use it), or None if no
+    # proof of phi was found.
+    # @param splits = disjunctions already being split into cases on the way to this subgoal
+    def _establish(self, problem, state, phi, splits = frozenset()):
+        index = state.index()
+        if phi in index.sentences:
+            if index.depth == 0 or index.inBody(phi):
+                return state
+            return self._write(state, phi, "R")
+        if not self._entails(index.sentences, phi):
+            return None
+
+        depth = state.depth
+        if phi.isImplication():
+            antecedent, consequent = phi.children
+            inner = self._establish(problem, self._write(state, antecedent, "A", depth + 1), consequent, splits)
+            if inner is not None:
+                return self._write(inner, phi, "II", depth)
+        elif phi.isBiconditional():
+            lhs, rhs = phi.children
+            forward = self._establish(problem, state, formula.implication(lhs, rhs), splits)
+            if forward is not None:
+                backward = self._establish(problem, forward, formula.implication(rhs, lhs), splits)
+                if backward is not None:
+                    return self._write(backward, phi, "BI")
+        elif phi.isConjunction():
+            result = state
+            for conjunct in phi.children:
+                result = self._establish(problem, result, conjunct, splits)
+                if result is None:
+                    break
+            if result is not None:
+                return result.introduceConjunction(phi.children)
+        elif phi.isDisjunction():
+            for disjunct in phi.children:
+                if self._entails(index.sentences, disjunct):
+                    result = self._establish(problem, state, disjunct, splits)
+                    if result is not None:
+                        return self._write(result, phi, "OI")
+        elif phi.isNegation():
+            refuted = self._refute(problem, state, phi.children[0])
+            if refuted is not None:
+                return refuted
+        # One step of Implication Elimination
+        bit = index.numbering.bits.get(phi, 0)
+        for antecedent, (consequents, _) in index.consequents.items():
+            if consequents & bit and antecedent in index.sentences:
+                return self._write(state, phi, "IE")
+        cases = self._splitCases(problem, state, phi, splits)
+        if cases is not None:
+            return cases
+        return self._search(problem, state, phi)
+
+    # Proves phi by cases on a disjunction in scope, or one that Implication Elimination can add to
+    # the scope, or returns None.
+    def _splitCases(self, problem, state, phi, splits):
+        index = state.index()
+        candidates = set(index.disjunctions)
+        for antecedent, (consequents, _) in index.consequents.items():
+            if antecedent in index.sentences:
+                candidates.update(consequent for consequent in index.numbering.members(consequents)
+                                  if consequent.isDisjunction())
+        for disjunction in sorted(candidates - splits, key = lambda candidate: candidate.text):
+            if not all(self._entails(index.sentences.union((disjunct,)), phi) for disjunct in disjunction.children):
+                continue
+            result = state
+            if disjunction not in index.sentences:
+                result = self._write(result, disjunction, "IE")
+            for disjunct in disjunction.children:
+                case = formula.implication(disjunct, phi)
+                result = self._establish(problem, result, case, splits | set([disjunction]))
+                if result is None:
+                    break
+            if result is not None:
+                return self._write(result, phi, "OE")
+        return None
+
+    # Proves ~phi by assuming phi and searching for a contradiction, or returns None.
+    def _refute(self, problem, state, phi):
+        depth = state.depth
+        subproblem = ContradictionProblem(problem.premises, None, problem.symbols, problem.statementSet,
+                                          problem.connectiveSet, self._write(state, phi, "A", depth + 1))
+        subproblem.stats = problem.stats
+        subproblem.costs = problem.costs
+        subproblem.memo = problem.memo
+        inner = self._run(search.UniformCostSearch(), subproblem)
+        if inner is None:
+            return None
+        return inner.introduceNegation(phi, findContradiction(inner.index()), depth)
+
+    # Proves phi by a forward search from the given state, or returns None.
+    def _search(self, problem, state, phi):
+        algorithm = search.AStarSearch(self.heuristic, self.weight)
+        return self._run(algorithm, problem.subproblem(state, phi))
+
+    # Runs a forward search with whatever is left of the budgets and returns its end state, or None.
+    def _run(self, algorithm, subproblem):
+        if self.maxNodes is not None:
+            algorithm.maxNodes = self.maxNodes - self.numStatesExplored
+        if self.deadline is not None:
+            algorithm.timeLimit = max(0, self.deadline - time.time())
+        algorithm.stats = self.stats
+        algorithm.cancel = self.cancel
+        algorithm.solve(subproblem)
+        self.numStatesExplored += algorithm.numStatesExplored
+        if algorithm.status == "proved":
+            return algorithm.endState
+        if algorithm.status in ("timeout", "cancelled"):
+            self.bestState = algorithm.bestState
+            raise search.OutOfBudget(algorithm.status)
+        if self.maxNodes is not None and self.numStatesExplored >= self.maxNodes:
+            self.bestState = algorithm.bestState
+            raise search.OutOfBudget("exhausted")
+        return None
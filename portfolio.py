@@ -0,0 +1,94 @@
+######################################################
+# File: portfolio.py                                 #
+# Author: Dan McFalls (dmcfalls@stanford.edu)        #
+# Project: Fitch Proof Automation with State-Search  #
+# Final Project for CS221: Artificial Intelligence   #
+######################################################
+
+# Races differently configured searches against each other on a pool of processes, and keeps the
+# first proof found.
+#
+# No single engine or set of rule costs suits every problem: the costs that make one exercise quick
+# make another one crawl. Running several at once on separate cores means a problem takes about as
+# long as the best strategy for it, without picking that strategy ahead of time.
+
+import multiprocessing
+import time
+
+import checker
+import fitch
+
+# A strategy is a (name, engine, costs) triple: an engine name as in fitch.findFitchProof, and a
+# fitch.CostProfile (None for fitch.DEFAULT_COSTS). With fewer workers than strategies, they are
+# started in this order, so the ones most likely to finish quickly come first.
+PORTFOLIO = [
+    ("plan", "plan", None),
+    ("refute", "refute", None),
+    ("astar", "astar", None),
+    ("fast", "fast", None),
+    # Subproofs nested deeply enough to need the third level are common in the harder exercises
+    ("astar-deep-assumptions", "astar", fitch.CostProfile(assumptionGrowth = 1.5, symbolAssumptionBias = 2)),
+    # Or Introduction and And Introduction priced like the other rules
+    ("astar-cheap-introductions", "astar", fitch.CostProfile(conjunctionCost = 1, repeatedConjunctionCost = 3,
+                                                             disjunctionCostPerCharacter = 0.25)),
+    ("fast-cheap-introductions", "fast", fitch.CostProfile(conjunctionCost = 1, repeatedConjunctionCost = 3,
+                                                           disjunctionCostPerCharacter = 0.25)),
+    ("ucs", "ucs", None),
+]
+
+# Runs one strategy on a problem; runs in a worker process.
+# @param task = (premises, goal, strategy, maxNodes, timeLimit)
+def runStrategy(task):
+    premises, goal, (name, engine, costs), maxNodes, timeLimit = task
+    result = fitch.findFitchProof(premises, goal, engine, maxNodes = maxNodes, timeLimit = timeLimit, costs = costs)
+    result.strategy = name
+    return result
+
+# Looks for a proof of a goal given premises (written as for fitch.findFitchProof) with every strategy
+# at once, and returns the fitch.ProofResult of the first one to find a proof, stopping the rest.
+# Proofs from the workers are checked (checker.py) before they count. If none of them finds one,
+# returns the result of the last to give up (with status "timeout" if any ran out of time). Either
+# way, the runtime is the wall-clock time of the whole race.
+# @param strategies = list of (name, engine, costs) strategies; see PORTFOLIO
+# @param workers = processes to race them on (default: one per strategy, so that they all run at once
+#   and the operating system shares the cores between them; with fewer, a strategy only starts when
+#   another one gives up, which never happens without a budget)
+# @param maxNodes, timeLimit = budgets for each strategy
+# @param cache = a proofcache.ProofCache to look the problem up in first, and to store the winning proof in
+def findPortfolioProof(premises, goal, strategies = PORTFOLIO, workers = None, maxNodes = None, timeLimit = None,
+                       cache = None):
+    startTime = time.time()
+    if cache is not None:
+        formattedPremises, formattedGoal = fitch.parseProblem(premises, goal)[:2]
+        hit = cache.lookup(formattedPremises, formattedGoal)
+        if hit is not None and checker.isValidProof(formattedPremises, formattedGoal, hit[0]):
+            lines, cost = hit
+            return fitch.ProofResult("proved", formattedPremises, formattedGoal, lines,
+                                     [fitch.actionString(line) for line in lines], 0, time.time() - startTime, cost,
+                                     cached = True)
+
+    if workers is None:
+        workers = len(strategies)
+    pool = multiprocessing.Pool(max(1, min(workers, len(strategies))))
+    tasks = [(premises, goal, strategy, maxNodes, timeLimit) for strategy in strategies]
+    result = None
+    timedOut = False
+    try:
+        for result in pool.imap_unordered(runStrategy, tasks):
+            # A proof from a worker is only kept if it checks out; a rejected one leaves the race to the others
+            checker.verifyResult(result)
+            timedOut = timedOut or result.status == "timeout"
+            # An invalid problem is invalid for every strategy, so there's no point waiting for the others
+            if result.status in ("proved", "invalid"):
+                break
+    finally:
+        # Stops any strategies still running
+        pool.terminate()
+        pool.join()
+
+    if result.status not in ("proved", "invalid", "rejected") and timedOut:
+        result.status = "timeout"
+    result.runtime = time.time() - startTime
+    if result.status == "proved" and cache is not None:
+        cache.store(result.premises, result.goal, result.lines, result.cost)
+    return result
@@ -0,0 +1,83 @@
+######################################################
+# File: proofcache.py                                #
+# Author: Dan McFalls (dmcfalls@stanford.edu)        #
+# Project: Fitch Proof Automation with State-Search  #
+# Final Project for CS221: Artificial Intelligence   #
+######################################################
+
+import json
+import os
+import sqlite3
+import time
+
+import formula
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".fitch_proofs.sqlite")
+
+# An on-disk cache of proofs, shared between runs (and processes).
+#
+# Problems are stored under a canonical form: premises and goal are parsed (which normalizes the
+# input syntax) and their symbols renamed to s0, s1, ... in order of first appearance, so
+# "p => q |- ~q => ~p" and "a => b |- ~b => ~a" share an entry. Proofs are stored in the canonical
+# symbols too and renamed back into the caller's symbols on a hit.
+#
+# The cache holds at most maxEntries proofs; storing past that evicts the least recently used ones.
+class ProofCache(object):
+    def __init__(self, path = DEFAULT_PATH, maxEntries = 10000):
+        self.path = path
+        self.maxEntries = maxEntries
+        self.connection = sqlite3.connect(path, timeout = 30)
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS proofs ("
+                                    "problem TEXT PRIMARY KEY, lines TEXT NOT NULL, cost REAL, lastUsed REAL NOT NULL)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS proofsByLastUsed ON proofs (lastUsed)")
+
+    # Returns (key, renaming) for a problem: the canonical text of the problem and the mapping from
+    # its atoms to the canonical ones.
+    def _canonicalize(self, premises, goal):
+        renaming = formula.canonicalRenaming(list(premises) + [goal])
+        sentences = [formula.substitute(premise, renaming).text for premise in premises]
+        key = " * ".join(sentences) + " |- " + formula.substitute(goal, renaming).text
+        return key, renaming
+
+    # Returns (lines, cost) for a cached proof of the goal from the premises (as Formulas), with the
+    # lines in the caller's symbols, or None on a miss. A row that can't be decoded (a sentence that
+    # doesn't parse, or a symbol the problem doesn't have) is deleted and counts as a miss.
+    def lookup(self, premises, goal):
+        key, renaming = self._canonicalize(premises, goal)
+        row = self.connection.execute("SELECT lines, cost FROM proofs WHERE problem = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        inverse = dict((canonical, original) for original, canonical in renaming.items())
+        memo = {}
+        try:
+            lines = [(formula.substitute(formula.parse(text), inverse, memo), justification, depth)
+                     for text, justification, depth in json.loads(row[0])]
+        except (ValueError, KeyError, TypeError):
+            with self.connection:
+                self.connection.execute("DELETE FROM proofs WHERE problem = ?", (key,))
+            return None
+        with self.connection:
+            self.connection.execute("UPDATE proofs SET lastUsed = ? WHERE problem = ?", (time.time(), key))
+        return lines, row[1]
+
+    # Stores a proof: the (sentence, justification, depth) lines that follow the premises.
+    def store(self, premises, goal, lines, cost = None):
+        key, renaming = self._canonicalize(premises, goal)
+        memo = {}
+        canonicalLines = [[formula.substitute(sentence, renaming, memo).text, justification, depth]
+                          for sentence, justification, depth in lines]
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO proofs VALUES (?, ?, ?, ?)",
+                                    (key, json.dumps(canonicalLines), cost, time.time()))
+            count = self.connection.execute("SELECT COUNT(*) FROM proofs").fetchone()[0]
+            if count > self.maxEntries:
+                self.connection.execute("DELETE FROM proofs WHERE problem IN "
+                                        "(SELECT problem FROM proofs ORDER BY lastUsed LIMIT ?)",
+                                        (count - self.maxEntries,))
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM proofs").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
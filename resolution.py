@@ -0,0 +1,415 @@
+######################################################
+# File: resolution.py                                #
+# Author: Dan McFalls (dmcfalls@stanford.edu)        #
+# Project: Fitch Proof Automation with State-Search  #
+# Final Project for CS221: Artificial Intelligence   #
+######################################################
+
+import time
+import util
+import formula
+import search
+import fitch
+
+# Proof by contradiction, found with DPLL and written out as a Fitch proof.
+#
+# To prove a goal G, the premises and ~G are converted to clauses and DPLL looks for an assignment
+# satisfying all of them. It branches on one atom at a time, propagates unit clauses, and backs up
+# whenever a clause is falsified. If there's no such assignment, the branches it explored form a
+# refutation tree: every leaf is a partial assignment that makes some premise (or ~G) false.
+#
+# The tree is then written out as nested proofs by contradiction, inside a subproof assuming ~G:
+#   * a branch on x assumes x, refutes it (the x branch), and concludes ~x by Negation Introduction;
+#     the ~x branch is then refuted in the same scope, with ~x in hand
+#     (unit propagation is a branch whose first half closes straight away)
+#   * a leaf evaluates the falsified formula F from the literals in scope, deriving ~F line by line
+#     with the rules for each connective, so F and ~F are a contradiction
+# Refuting ~G gives ~~G by Negation Introduction, and G by Negation Elimination.
+#
+# A clause falsified by a partial assignment makes the formula it came from false under the same
+# assignment in three-valued (strong Kleene) logic, where unassigned atoms are "unknown"; that's
+# what lets the leaves be evaluated without assigning every atom.
+
+# Past this many clauses for one formula, the formula is left out of unit propagation and only
+# checked by evaluation (distributing || over && can blow up exponentially).
+MAX_CLAUSES = 2000
+
+class _TooManyClauses(Exception):
+    pass
+
+# Returns the clauses of phi (or of ~phi if positive is False) as a list of frozensets of
+# (atom, value) literals, by pushing negations inward and distributing || over &&.
+def toClauses(phi, positive = True):
+    if phi.isAtom():
+        return [frozenset([(phi, positive)])]
+    if phi.isNegation():
+        return toClauses(phi.children[0], not positive)
+    if phi.isImplication():
+        lhs, rhs = phi.children
+        if positive:
+            return _disjoin([toClauses(lhs, False), toClauses(rhs, True)])
+        return toClauses(lhs, True) + toClauses(rhs, False)
+    if phi.isBiconditional():
+        lhs, rhs = phi.children
+        if positive:
+            return (_disjoin([toClauses(lhs, False), toClauses(rhs, True)]) +
+                    _disjoin([toClauses(lhs, True), toClauses(rhs, False)]))
+        # ~(lhs <-> rhs) is (lhs || rhs) && (~lhs || ~rhs)
+        return (_disjoin([toClauses(lhs, True), toClauses(rhs, True)]) +
+                _disjoin([toClauses(lhs, False), toClauses(rhs, False)]))
+    # A conjunction, or a negated disjunction, is the union of its parts' clauses
+    if phi.isConjunction() == positive:
+        clauses = []
+        for child in phi.children:
+            clauses.extend(toClauses(child, positive))
+        return clauses
+    return _disjoin([toClauses(child, positive) for child in phi.children])
+
+# Returns the clauses of the disjunction of several clause lists.
+def _disjoin(clauseLists):
+    result = [frozenset()]
+    for clauses in clauseLists:
+        result = [left | right for left in result for right in clauses]
+        # Clauses holding both x and ~x are always true
+        result = [clause for clause in result if not any((atom, not value) in clause for atom, value in clause)]
+        if len(result) > MAX_CLAUSES:
+            raise _TooManyClauses()
+    return result
+
+# Evaluates phi under a partial assignment {atom: value} in strong Kleene logic: returns True,
+# False, or None if phi's value depends on atoms that aren't assigned.
+def evaluate(phi, assignment):
+    if phi.isAtom():
+        return assignment.get(phi)
+    values = [evaluate(child, assignment) for child in phi.children]
+    if phi.isNegation():
+        return None if values[0] is None else not values[0]
+    if phi.isConjunction():
+        if False in values: return False
+        return None if None in values else True
+    if phi.isDisjunction():
+        if True in values: return True
+        return None if None in values else False
+    lhs, rhs = values
+    if phi.isImplication():
+        if lhs is False or rhs is True: return True
+        return None if lhs is None or rhs is None else False
+    return None if lhs is None or rhs is None else lhs == rhs
+
+# Nodes of a refutation tree.
+class Leaf(object):
+    def __init__(self, falsified):
+        self.falsified = falsified          # Formula in scope made false by the assignment
+
+class Branch(object):
+    def __init__(self, atom, value, first, rest):
+        self.atom = atom                    # Atom assigned first to value, then to the other value
+        self.value = value
+        self.first = first                  # Refutation with atom = value
+        self.rest = rest                    # Refutation with atom = not value
+
+# DPLL on the clauses of some formulas. refute() returns a refutation tree, or None if the formulas
+# can all be true together.
+class DPLL(object):
+    def __init__(self, formulas, maxNodes = None, deadline = None, cancel = None):
+        self.clauses = []                   # (clause, formula it came from)
+        self.unclaused = []                 # Formulas with too many clauses, checked by evaluation
+        self.atoms = []
+        for phi in formulas:
+            try:
+                self.clauses.extend((clause, phi) for clause in toClauses(phi))
+            except _TooManyClauses:
+                self.unclaused.append(phi)
+            atoms = [node for node in phi.subformulas() if node.isAtom() and node not in self.atoms]
+            self.atoms.extend(sorted(atoms, key = lambda atom: atom.name))
+        self.maxNodes = maxNodes
+        self.deadline = deadline
+        self.cancel = cancel
+        self.nodes = 0
+
+    def refute(self, assignment = None):
+        if assignment is None: assignment = {}
+        self.nodes += 1
+        if self.maxNodes is not None and self.nodes > self.maxNodes:
+            raise search.OutOfBudget("exhausted")
+        if self.deadline is not None and time.time() > self.deadline:
+            raise search.OutOfBudget("timeout")
+        if self.cancel is not None and self.cancel.isCancelled():
+            raise search.OutOfBudget("cancelled")
+
+        for phi in self.unclaused:
+            if evaluate(phi, assignment) is False:
+                return Leaf(phi)
+        unit = None
+        counts = {}
+        for clause, phi in self.clauses:
+            unassigned = []
+            satisfied = False
+            for atom, value in clause:
+                assigned = assignment.get(atom)
+                if assigned is None:
+                    unassigned.append((atom, value))
+                elif assigned == value:
+                    satisfied = True
+                    break
+            if satisfied:
+                continue
+            if not unassigned:
+                return Leaf(phi)
+            if len(unassigned) == 1 and unit is None:
+                unit = (unassigned[0], phi)
+            for atom, _ in unassigned:
+                counts[atom] = counts.get(atom, 0) + 1
+
+        if unit is not None:
+            # The other value of the unit literal falsifies the clause outright
+            (atom, value), phi = unit
+            rest = self.refute(_extend(assignment, atom, value))
+            if rest is None:
+                return None
+            return Branch(atom, not value, Leaf(phi), rest)
+
+        # Branches on the atom in the most open clauses, or on any unassigned atom left
+        if counts:
+            atom = max(self.atoms, key = lambda candidate: counts.get(candidate, 0))
+        else:
+            unassigned = [candidate for candidate in self.atoms if candidate not in assignment]
+            if not unassigned:
+                return None
+            atom = unassigned[0]
+        first = self.refute(_extend(assignment, atom, True))
+        if first is None:
+            return None
+        rest = self.refute(_extend(assignment, atom, False))
+        if rest is None:
+            return None
+        return Branch(atom, True, first, rest)
+
+def _extend(assignment, atom, value):
+    extended = dict(assignment)
+    extended[atom] = value
+    return extended
+
+# Writes refutation trees out as Fitch proofs. Every method takes the ProofState written so far and
+# returns the state after the lines it adds.
+class ProofWriter(object):
+    # Appends a line unless phi is already a line of the current subproof (or in scope at level 0);
+    # something in scope from outside the subproof is reiterated instead.
+    def have(self, state, phi, justification):
+        index = state.index()
+        if index.inBody(phi) or (index.depth == 0 and phi in index.sentences):
+            return state
+        if phi in index.sentences:
+            return state.extend(phi, "R")
+        return state.extend(phi, justification)
+
+    # Derives ~phi by assuming phi and calling contradiction(state), which must return the state and
+    # a sentence psi such that psi and ~psi are both lines of the subproof.
+    def negate(self, state, phi, contradiction):
+        negation = formula.negation(phi)
+        if negation in state.index().sentences:
+            return state
+        depth = state.depth
+        state, psi = contradiction(state.extend(phi, "A", depth + 1))
+        return state.introduceNegation(phi, psi, depth)
+
+    # Derives any sentence z from a sentence x and its negation, both in scope.
+    def exFalso(self, state, x, z):
+        if z in state.index().sentences:
+            return self.have(state, z, "R")
+        def contradiction(state):
+            state = self.have(state, x, "R")
+            return self.have(state, formula.negation(x), "R"), x
+        state = self.negate(state, formula.negation(z), contradiction)
+        return state.extend(z, "NE")
+
+    # Derives phi if it's true under the assignment, or ~phi if it's false, from the literals in scope
+    # (which must agree with the assignment).
+    def evaluate(self, state, phi, assignment):
+        value = evaluate(phi, assignment)
+        if value is None:
+            raise ValueError("%s has no value under the assignment" % phi)
+        target = phi if value else formula.negation(phi)
+        if target in state.index().sentences:
+            return state
+        if phi.isAtom():
+            raise ValueError("No literal for %s in scope" % phi)
+
+        if phi.isNegation():
+            child = phi.children[0]
+            if value:
+                return self.evaluate(state, child, assignment)
+            # ~~child from child
+            state = self.evaluate(state, child, assignment)
+            def contradiction(state):
+                state = self.have(state, child, "R")
+                return self.have(state, phi, "R"), child
+            return self.negate(state, phi, contradiction)
+
+        if phi.isConjunction():
+            if value:
+                for child in phi.children:
+                    state = self.evaluate(state, child, assignment)
+                return state.introduceConjunction(phi.children)
+            false = [child for child in phi.children if evaluate(child, assignment) is False][0]
+            state = self.evaluate(state, false, assignment)
+            def contradiction(state):
+                state = self.have(state, false, "AE")
+                return self.have(state, formula.negation(false), "R"), false
+            return self.negate(state, phi, contradiction)
+
+        if phi.isDisjunction():
+            if value:
+                true = [child for child in phi.children if evaluate(child, assignment) is True][0]
+                state = self.evaluate(state, true, assignment)
+                return self.have(state, phi, "OI")
+            for child in phi.children:
+                state = self.evaluate(state, child, assignment)
+            # Every disjunct implies the first one (the others by contradiction), so assuming the
+            # disjunction gives the first disjunct by Or Elimination, against its negation in scope.
+            first = phi.children[0]
+            def contradiction(state):
+                for child in phi.children:
+                    case = formula.implication(child, first)
+                    if case in state.index().sentences:
+                        continue
+                    depth = state.depth
+                    state = state.extend(child, "A", depth + 1)
+                    if child == first:
+                        state = self.have(state, first, "R")
+                    else:
+                        state = self.have(self.exFalso(state, child, first), first, "R")
+                    state = state.extend(case, "II", depth)
+                state = self.have(state, first, "OE")
+                return self.have(state, formula.negation(first), "R"), first
+            return self.negate(state, phi, contradiction)
+
+        lhs, rhs = phi.children
+        if phi.isImplication():
+            if value:
+                depth = state.depth
+                if evaluate(rhs, assignment) is True:
+                    state = self.evaluate(state, rhs, assignment)
+                    state = state.extend(lhs, "A", depth + 1)
+                    state = self.have(state, rhs, "R")
+                else:
+                    state = self.evaluate(state, lhs, assignment)
+                    state = state.extend(lhs, "A", depth + 1)
+                    state = self.have(self.exFalso(state, lhs, rhs), rhs, "R")
+                return state.extend(phi, "II", depth)
+            state = self.evaluate(state, lhs, assignment)
+            state = self.evaluate(state, rhs, assignment)
+            def contradiction(state):
+                state = self.have(state, rhs, "IE")
+                return self.have(state, formula.negation(rhs), "R"), rhs
+            return self.negate(state, phi, contradiction)
+
+        # Biconditional
+        if value:
+            state = self.evaluate(state, formula.implication(lhs, rhs), assignment)
+            state = self.evaluate(state, formula.implication(rhs, lhs), assignment)
+            return state.extend(phi, "BI")
+        state = self.evaluate(state, lhs, assignment)
+        state = self.evaluate(state, rhs, assignment)
+        # Whichever side is true implies the other, which is false
+        true, false = (lhs, rhs) if evaluate(lhs, assignment) else (rhs, lhs)
+        def contradiction(state):
+            state = self.have(state, formula.implication(true, false), "BE")
+            state = self.have(state, false, "IE")
+            return self.have(state, formula.negation(false), "R"), false
+        return self.negate(state, phi, contradiction)
+
+    # Derives a contradiction from phi, which is in scope but false under the assignment; returns the
+    # state and a sentence psi such that psi and ~psi are both lines of the current subproof. Where an
+    # elimination rule applies to phi, the part of it that is false is pulled out and contradicted;
+    # otherwise ~phi is derived and contradicts phi itself.
+    def contradict(self, state, phi, assignment):
+        if phi.isNegation():
+            psi = phi.children[0]
+            state = self.have(self.evaluate(state, psi, assignment), psi, "R")
+            return self.have(state, phi, "R"), psi
+        if phi.isConjunction():
+            psi = [child for child in phi.children if evaluate(child, assignment) is False][0]
+            state = self.have(self.evaluate(state, psi, assignment), psi, "AE")
+        elif phi.isImplication():
+            lhs, psi = phi.children
+            state = self.evaluate(self.evaluate(state, lhs, assignment), psi, assignment)
+            state = self.have(state, psi, "IE")
+        elif phi.isBiconditional():
+            lhs, rhs = phi.children
+            true, psi = (lhs, rhs) if evaluate(lhs, assignment) else (rhs, lhs)
+            state = self.evaluate(self.evaluate(state, true, assignment), psi, assignment)
+            state = self.have(state, formula.implication(true, psi), "BE")
+            state = self.have(state, psi, "IE")
+        else:
+            psi = phi
+            state = self.have(self.evaluate(state, phi, assignment), phi, "R")
+        return self.have(state, formula.negation(psi), "R"), psi
+
+    # Writes out a refutation tree in the current scope; returns the state and a sentence psi such
+    # that psi and ~psi are both lines of the current subproof.
+    def refutation(self, state, tree, assignment):
+        if isinstance(tree, Leaf):
+            return self.contradict(state, tree.falsified, assignment)
+
+        atom, value = tree.atom, tree.value
+        literal = atom if value else formula.negation(atom)
+        first = _extend(assignment, atom, value)
+        # The case is already assumed, or its opposite is already in scope, and needs no subproof
+        if literal in state.index().sentences:
+            return self.refutation(state, tree.first, first)
+        other = formula.negation(atom) if value else atom
+        if other not in state.index().sentences:
+            state = self.negate(state, literal, lambda state: self.refutation(state, tree.first, first))
+            if not value:
+                state = self.have(state, atom, "NE")
+        return self.refutation(state, tree.rest, _extend(assignment, atom, not value))
+
+# Proves a fitch.FitchProblem by contradiction, with the same interface and results as
+# search.AStarSearch: numStatesExplored counts DPLL nodes and totalCost is the number of lines.
+# Problems whose goal doesn't follow from the premises end with status "exhausted".
+class RefutationProver(util.SearchAlgorithm):
+    def __init__(self, verbose = 0, maxNodes = None, timeLimit = None, cancel = None):
+        self.verbose = verbose
+        self.maxNodes = maxNodes
+        self.timeLimit = timeLimit
+        self.cancel = cancel
+
+    def solve(self, problem):
+        self.actions = None
+        self.totalCost = None
+        self.numStatesExplored = 0
+        self.endState = None
+        self.bestState = None                   # Refutations aren't written until they're complete
+        self.status = "exhausted"
+        deadline = None if self.timeLimit is None else time.time() + self.timeLimit
+
+        startState = problem.startState()
+        goal = problem.goal
+        if goal in startState.index().sentences:
+            state = startState.extend(goal, "R")
+        else:
+            notGoal = formula.negation(goal)
+            dpll = DPLL(list(problem.premises) + [notGoal], self.maxNodes, deadline, self.cancel)
+            try:
+                tree = dpll.refute()
+            except search.OutOfBudget as stop:
+                self.status = stop.status
+                tree = None
+            self.numStatesExplored = dpll.nodes
+            if tree is None:
+                if self.verbose >= 1:
+                    print "No refutation found"
+                return
+            writer = ProofWriter()
+            state = writer.negate(startState, notGoal, lambda state: writer.refutation(state, tree, {}))
+            state = state.extend(goal, "NE")
+
+        self.status = "proved"
+        self.endState = state
+        lines = state.lines()[startState.length:]
+        self.actions = [fitch.actionString(line) for line in lines]
+        self.totalCost = len(lines)
+        if self.verbose >= 1:
+            print "numStatesExplored = %d" % self.numStatesExplored
+            print "actions = %s" % self.actions
@@ -0,0 +1,326 @@
+######################################################
+# File: search.py                                    #
+# Author: Dan McFalls (dmcfalls@stanford.edu)        #
+# Project: Fitch Proof Automation with State-Search  #
+# Final Project for CS221: Artificial Intelligence   #
+######################################################
+
+import heapq
+import itertools
+import time
+import util
+
+# A flag another thread, or another process, can raise to stop a search early. The search checks it
+# once per expansion (as it checks its time limit) and stops with status "cancelled".
+#
+# The flag is one slot of an array of them: a list for searches in the same process, or a
+# multiprocessing.Array inherited by worker processes (which can't be handed one any other way), so
+# that a server can cancel a search running in a worker by raising its slot.
+class CancellationToken(object):
+    def __init__(self, flags = None, slot = 0):
+        self.flags = [0] if flags is None else flags
+        self.slot = slot
+
+    def cancel(self):
+        self.flags[self.slot] = 1
+
+    def isCancelled(self):
+        return self.flags[self.slot] != 0
+
+# Returns 0 for every state, which makes A* behave exactly like uniform cost search.
+def nullHeuristic(problem, state):
+    return 0
+
+# A* search over any util.SearchProblem, with the same interface as util.UniformCostSearch: after
+# solve(problem), actions, totalCost and numStatesExplored describe the result. In addition, status
+# is "proved", "timeout", "cancelled" (see CancellationToken) or "exhausted" (no proof within the
+# node budget, or none at all), and endState is the final state of the proof found.
+#
+# If the problem defines stateKey(state), states with equal keys are treated as transpositions of
+# each other: only the first one to be expanded (the cheapest) is, and any state re-reached under
+# the same key is pruned. The proof returned is still the concrete path to the state expanded.
+#
+# Heuristics are plain functions heuristic(problem, state) -> estimated remaining cost. They are
+# evaluated lazily: a successor enters the frontier with a bound derived from its parent's estimate
+# and is only scored when it reaches the front, so states that are never expanded are never scored.
+# The bound is exact for consistent heuristics, and then (with weight 1) the proof found is optimal.
+#
+# If the problem defines successorGroups(state) (see fitch.FitchProblem), successors are generated
+# lazily: groups given as lists enter the frontier right away, but a group given as a generator
+# enters as a single entry bounded by its cheapest remaining successor, and only builds its next
+# successor when that entry reaches the front. Rules whose successors are rarely taken then cost
+# almost nothing to offer. (This needs weight >= 1, as the bound assumes.)
+#
+# A stats.SearchStats passed as stats is told about every expansion and every successor generated.
+#
+# When the search stops without a proof, bestState is the expanded state that looked closest to the
+# end: the one with the lowest estimate, under progress(problem, state) if given (which is how UCS,
+# whose estimates are all 0, can rank them too) or else the heuristic. Its path is the most promising
+# partial proof.
+#
+# The frontier holds every state generated but not yet expanded, which is what runs out of memory on
+# long proofs. With maxFrontier set, the search stops with status "memory" once the frontier holds
+# more states than that, so the caller can go on with IDAStarSearch instead.
+class AStarSearch(util.SearchAlgorithm):
+    # @param heuristic = function(problem, state) giving an estimate of the remaining cost
+    # @param weight = multiplier on the heuristic; weights above 1 give up optimality for speed
+    # @param maxNodes = give up after expanding this many states (None for no limit)
+    # @param timeLimit = give up after this many seconds of wall-clock time (None for no limit)
+    # @param stats = a stats.SearchStats to record the search in (None to skip recording)
+    # @param maxFrontier = give up once the frontier holds more than this many states (None for no limit)
+    # @param cancel = a CancellationToken to stop at when raised (None if the search can't be cancelled)
+    # @param progress = function(problem, state) ranking states for bestState (None to use the heuristic)
+    def __init__(self, heuristic = nullHeuristic, weight = 1, verbose = 0, maxNodes = None, timeLimit = None,
+                 stats = None, maxFrontier = None, cancel = None, progress = None):
+        self.heuristic = heuristic
+        self.weight = weight
+        self.verbose = verbose
+        self.maxNodes = maxNodes
+        self.timeLimit = timeLimit
+        self.stats = stats
+        self.maxFrontier = maxFrontier
+        self.cancel = cancel
+        self.progress = progress
+
+    def solve(self, problem):
+        self.actions = None
+        self.totalCost = None
+        self.numStatesExplored = 0
+        self.endState = None
+        self.bestState = None
+        self.status = "exhausted"
+        deadline = None if self.timeLimit is None else time.time() + self.timeLimit
+        bestEstimate = None
+
+        # Frontier entries are (priority, -pastCost, order, pastCost, state, estimate, scored, successors).
+        # Ties in priority go to the deeper state, then to the older entry. An entry with successors
+        # set stands for the rest of a generator of successors of (already expanded) state.
+        frontier = []
+        pastCosts = {}          # Cheapest known cost of reaching each state
+        backpointers = {}       # state -> (action, previous state)
+        explored = set()        # Keys of the states expanded so far
+        stateKey = getattr(problem, "stateKey", None)
+        successorGroups = getattr(problem, "successorGroups", None)
+        stats = self.stats
+
+        # Pushes a successor of a state onto the frontier, unless it was already reached as cheaply.
+        def push(action, newState, cost, state, pastCost, estimate):
+            newPastCost = pastCost + cost
+            if newPastCost >= pastCosts.get(newState, float("inf")):
+                return
+            pastCosts[newState] = newPastCost
+            backpointers[newState] = (action, state)
+            if stats is not None:
+                stats.recordSuccessor(newState, cost)
+            bound = newPastCost + max(0, estimate - self.weight * cost)
+            heapq.heappush(frontier, (bound, -newPastCost, next(counter), newPastCost, newState, 0, False, None))
+
+        # The lowest bound push can give a successor costing at least cost: the bound falls as the
+        # cost rises until the cost covers the heuristic's (unweighted) estimate, then rises with it.
+        def lowestBound(pastCost, estimate, cost):
+            return pastCost + max(cost, estimate / float(self.weight))
+
+        counter = itertools.count(1)
+        startState = problem.startState()
+        pastCosts[startState] = 0
+        heapq.heappush(frontier, (0, 0, 0, 0, startState, 0, False, None))
+
+        while frontier:
+            priority, _, _, pastCost, state, estimate, scored, successors = heapq.heappop(frontier)
+            if successors is not None:
+                # Takes the next successor from the generator, and puts the rest back behind it
+                for action, newState, cost in successors:
+                    push(action, newState, cost, state, pastCost, estimate)
+                    heapq.heappush(frontier, (lowestBound(pastCost, estimate, cost), -pastCost, next(counter),
+                                              pastCost, state, estimate, True, successors))
+                    break
+                continue
+            if pastCost > pastCosts[state]:
+                continue
+            key = stateKey(state) if stateKey else state
+            if key in explored:
+                continue
+
+            # Scores the state now that it has reached the front, and puts it back if it turns out
+            # to be worse than its bound said.
+            if not scored:
+                estimate = self.weight * self.heuristic(problem, state)
+                if pastCost + estimate > priority:
+                    heapq.heappush(frontier, (pastCost + estimate, -pastCost, next(counter), pastCost, state, estimate,
+                                              True, None))
+                    continue
+
+            if self.maxNodes is not None and self.numStatesExplored >= self.maxNodes:
+                break
+            if deadline is not None and time.time() > deadline:
+                self.status = "timeout"
+                break
+            if self.cancel is not None and self.cancel.isCancelled():
+                self.status = "cancelled"
+                break
+            if self.maxFrontier is not None and len(frontier) > self.maxFrontier:
+                self.status = "memory"
+                break
+            explored.add(key)
+            self.numStatesExplored += 1
+            if stats is not None:
+                stats.recordExpansion(state, len(frontier))
+            closeness = estimate if self.progress is None else self.progress(problem, state)
+            if bestEstimate is None or closeness < bestEstimate:
+                bestEstimate = closeness
+                self.bestState = state
+            if self.verbose >= 2:
+                print "Exploring %s with pastCost %s and estimate %s" % (state, pastCost, estimate)
+
+            if problem.isEnd(state):
+                self.status = "proved"
+                self.endState = state
+                self.actions = []
+                while state != startState:
+                    action, prevState = backpointers[state]
+                    self.actions.append(action)
+                    state = prevState
+                self.actions.reverse()
+                self.totalCost = pastCost
+                if self.verbose >= 1:
+                    print "numStatesExplored = %d" % self.numStatesExplored
+                    print "totalCost = %s" % self.totalCost
+                    print "actions = %s" % self.actions
+                return
+
+            if successorGroups is None:
+                for action, newState, cost in problem.succAndCost(state):
+                    push(action, newState, cost, state, pastCost, estimate)
+            else:
+                for lowestCost, successors in successorGroups(state):
+                    if isinstance(successors, list):
+                        for action, newState, cost in successors:
+                            push(action, newState, cost, state, pastCost, estimate)
+                    else:
+                        heapq.heappush(frontier, (lowestBound(pastCost, estimate, lowestCost), -pastCost,
+                                                  next(counter), pastCost, state, estimate, True, successors))
+
+        if self.verbose >= 1:
+            print "No path found"
+
+# Uniform cost search: A* with no heuristic. Unlike util.UniformCostSearch, it merges transpositions
+# when the problem defines stateKey.
+class UniformCostSearch(AStarSearch):
+    def __init__(self, verbose = 0, maxNodes = None, timeLimit = None, stats = None, maxFrontier = None,
+                 cancel = None, progress = None):
+        AStarSearch.__init__(self, nullHeuristic, 1, verbose, maxNodes, timeLimit, stats, maxFrontier, cancel,
+                             progress)
+
+# Raised to unwind a recursive search (IDAStarSearch, the planner, DPLL) when a budget runs out.
+class OutOfBudget(Exception):
+    def __init__(self, status):
+        Exception.__init__(self, status)
+        self.status = status
+
+# Iterative-deepening A*: memory-bounded search, with the same interface and results as AStarSearch.
+# Each iteration is a depth-first search that goes no further than states whose cost plus estimate
+# is within a bound, starting at the start state's estimate and raised each iteration to the
+# smallest value that went over it. Only the current path is kept, plus a table of the cheapest cost
+# each state key (see AStarSearch) was reached at in this iteration, to cut off transpositions. The
+# table holds at most maxTableSize keys, so memory stays bounded however long the proof is; states
+# past the cap are simply searched again when reached again. States are re-expanded in every
+# iteration, which is the time traded for the memory.
+#
+# With an admissible heuristic and weight 1, the proof found is optimal. bestState is kept as in
+# AStarSearch.
+class IDAStarSearch(util.SearchAlgorithm):
+    # @param maxTableSize = most state keys remembered for cutting off transpositions
+    # (the other parameters are as in AStarSearch)
+    def __init__(self, heuristic = nullHeuristic, weight = 1, verbose = 0, maxNodes = None, timeLimit = None,
+                 stats = None, maxTableSize = 100000, cancel = None, progress = None):
+        self.heuristic = heuristic
+        self.weight = weight
+        self.verbose = verbose
+        self.maxNodes = maxNodes
+        self.timeLimit = timeLimit
+        self.stats = stats
+        self.maxTableSize = maxTableSize
+        self.cancel = cancel
+        self.progress = progress
+
+    def solve(self, problem):
+        self.actions = None
+        self.totalCost = None
+        self.numStatesExplored = 0
+        self.endState = None
+        self.bestState = None
+        self.bestEstimate = None
+        self.status = "exhausted"
+        self.deadline = None if self.timeLimit is None else time.time() + self.timeLimit
+        self.problem = problem
+        self.stateKey = getattr(problem, "stateKey", None)
+
+        startState = problem.startState()
+        bound = self.weight * self.heuristic(problem, startState)
+        try:
+            while True:
+                self.table = {}
+                self.nextBound = float("inf")
+                path = self._search(startState, 0, bound)
+                if path is not None:
+                    self.status = "proved"
+                    self.endState = path[-1][1]
+                    self.actions = [action for action, _ in path[1:]]
+                    self.totalCost = self.pathCost
+                    break
+                if self.nextBound == float("inf"):
+                    break
+                if self.verbose >= 1:
+                    print "Raising the bound from %s to %s" % (bound, self.nextBound)
+                bound = self.nextBound
+        except OutOfBudget as stop:
+            self.status = stop.status
+        self.table = None
+
+        if self.verbose >= 1:
+            print "numStatesExplored = %d" % self.numStatesExplored
+            print "totalCost = %s" % self.totalCost
+            print "actions = %s" % self.actions
+
+    # Depth-first search below a state reached at pastCost; returns the [(action, state)] path from
+    # it to an end state (with None as the first action), or None if there's none within the bound.
+    def _search(self, state, pastCost, bound):
+        estimate = self.weight * self.heuristic(self.problem, state)
+        if pastCost + estimate > bound:
+            self.nextBound = min(self.nextBound, pastCost + estimate)
+            return None
+        key = self.stateKey(state) if self.stateKey else state
+        if self.table.get(key, float("inf")) <= pastCost:
+            return None
+        if key in self.table or len(self.table) < self.maxTableSize:
+            self.table[key] = pastCost
+
+        if self.maxNodes is not None and self.numStatesExplored >= self.maxNodes:
+            raise OutOfBudget("exhausted")
+        if self.deadline is not None and time.time() > self.deadline:
+            raise OutOfBudget("timeout")
+        if self.cancel is not None and self.cancel.isCancelled():
+            raise OutOfBudget("cancelled")
+        self.numStatesExplored += 1
+        if self.stats is not None:
+            self.stats.recordExpansion(state, len(self.table))
+        closeness = estimate if self.progress is None else self.progress(self.problem, state)
+        if self.bestEstimate is None or closeness < self.bestEstimate:
+            self.bestEstimate = closeness
+            self.bestState = state
+        if self.verbose >= 2:
+            print "Exploring %s with pastCost %s and estimate %s" % (state, pastCost, estimate)
+
+        if self.problem.isEnd(state):
+            self.pathCost = pastCost
+            return [(None, state)]
+        successors = self.problem.succAndCost(state)
+        successors.sort(key = lambda successor: successor[2])
+        for action, newState, cost in successors:
+            if self.stats is not None:
+                self.stats.recordSuccessor(newState, cost)
+            path = self._search(newState, pastCost + cost, bound)
+            if path is not None:
+                path[0] = (action, newState)
+                return [(None, state)] + path
+        return None
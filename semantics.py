@@ -0,0 +1,159 @@
+######################################################
+# File: semantics.py                                 #
+# Author: Dan McFalls (dmcfalls@stanford.edu)        #
+# Project: Fitch Proof Automation with State-Search  #
+# Final Project for CS221: Artificial Intelligence   #
+######################################################
+
+# Truth tables, used to reject goals that don't follow from the premises before searching for a
+# proof that doesn't exist.
+#
+# A truth table over n symbols has 2**n rows, one per assignment. Each formula's column is stored
+# as a single integer with bit r set if the formula is true in row r, so evaluating a connective
+# over every row at once is one or two bitwise operations on Python's arbitrary-size integers.
+
+# Past this many symbols a table has too many rows to be worth building (2**22 bits is 512KB per
+# column); the check is skipped and the search runs as usual.
+MAX_SYMBOLS = 22
+
+# Most bits a table's columns may hold in all, counting a column for every subformula of the problem
+# and its negation (2**27 bits is 16MB). Every column costs time to build as well as memory, and none
+# of it counts against the search's budgets, so problems with many formulas over many symbols skip
+# the table too.
+MAX_TABLE_BITS = 1 << 27
+
+class TruthTable(object):
+    # @param symbols = the atoms to assign; row r makes symbols[i] true if bit i of r is set
+    def __init__(self, symbols):
+        self.symbols = list(symbols)
+        rows = 1 << len(self.symbols)
+        self.full = (1 << rows) - 1
+        self.columns = {}
+        for i, symbol in enumerate(self.symbols):
+            # Blocks of 2**i false rows then 2**i true rows, repeated to fill the table
+            block = 1 << i
+            column = ((1 << block) - 1) << block
+            width = 2 * block
+            while width < rows:
+                column |= column << width
+                width *= 2
+            self.columns[symbol] = column
+        self.memo = {}
+
+    # Returns the column of phi: an integer whose bit r is set if phi is true in row r.
+    def column(self, phi):
+        value = self.memo.get(phi)
+        if value is not None:
+            return value
+        # Evaluates children before parents, without recursing
+        pending = [phi]
+        while pending:
+            node = pending[-1]
+            if node in self.memo:
+                pending.pop()
+                continue
+            missing = [child for child in node.children if child not in self.memo]
+            if missing:
+                pending.extend(missing)
+                continue
+            pending.pop()
+            self.memo[node] = self._evaluate(node)
+        return self.memo[phi]
+
+    def _evaluate(self, node):
+        if node.isAtom():
+            return self.columns[node]
+        values = [self.memo[child] for child in node.children]
+        if node.isNegation():
+            return self.full ^ values[0]
+        if node.isConjunction():
+            return reduce(lambda a, b: a & b, values)
+        if node.isDisjunction():
+            return reduce(lambda a, b: a | b, values)
+        if node.isImplication():
+            return (self.full ^ values[0]) | values[1]
+        return self.full ^ (values[0] ^ values[1])
+
+    # Returns the assignment {symbol name: truth value} of a row.
+    def assignment(self, row):
+        return dict((symbol.name, bool(row >> i & 1)) for i, symbol in enumerate(self.symbols))
+
+    # Returns the column of the rows where every given formula is true.
+    def models(self, formulas):
+        value = self.full
+        for phi in formulas:
+            value &= self.column(phi)
+        return value
+
+    # Returns True if phi is true in every row where all of the premises are.
+    def entails(self, premises, phi):
+        return self.models(premises) & ~self.column(phi) == 0
+
+# Returns the atoms appearing in any of the formulas, sorted by name.
+def atomsOf(formulas):
+    atoms = set()
+    for phi in formulas:
+        atoms.update(node for node in phi.subformulas() if node.isAtom())
+    return sorted(atoms, key = lambda atom: atom.name)
+
+# Returns a TruthTable over the atoms of the formulas (and any extra symbols), or None if it would be
+# too big to build: more than MAX_SYMBOLS symbols, or more than MAX_TABLE_BITS bits for the columns
+# of the formulas' subformulas and their negations.
+def tableFor(formulas, symbols = ()):
+    subformulas = set(symbols)
+    for phi in formulas:
+        subformulas.update(phi.subformulas())
+    symbols = atomsOf(list(formulas) + list(symbols))
+    if len(symbols) > MAX_SYMBOLS or (2 * len(subformulas)) << len(symbols) > MAX_TABLE_BITS:
+        return None
+    return TruthTable(symbols)
+
+# The result of checking whether a goal follows from premises.
+class EntailmentCheck(object):
+    def __init__(self, table, models, entailed, counterModel):
+        self.table = table                  # TruthTable over the problem's symbols
+        self.models = models                # column of the rows where every premise is true
+        self.entailed = entailed            # whether the goal is true in every model of the premises
+        self.counterModel = counterModel    # {symbol name: value} making the premises true and the goal false
+
+    # Returns the subset of the given formulas that are true in every model of the premises.
+    def consequences(self, formulas):
+        return frozenset(phi for phi in formulas if self.models & ~self.table.column(phi) == 0)
+
+# Checks whether premises |= goal by truth table.
+# @return an EntailmentCheck, or None if the problem is too big for a truth table (see tableFor)
+def checkEntailment(premises, goal):
+    table = tableFor(list(premises) + [goal])
+    if table is None:
+        return None
+    models = table.models(premises)
+    counterRows = models & ~table.column(goal)
+    if counterRows == 0:
+        return EntailmentCheck(table, models, True, None)
+    # The lowest row that is a counter-model
+    row = (counterRows & -counterRows).bit_length() - 1
+    return EntailmentCheck(table, models, False, table.assignment(row))
+
+# Returns the premises that can contribute to a proof of the goal, in their original order: those
+# linked to the goal through the atoms they share, directly or through other premises. A premise
+# never reached shares nothing with the goal or the premises about it, so no rule can use it on the
+# way there. Premises that are linked are all kept, even ones the goal follows from without: the
+# proof may still need them (p || ~p to split into cases on, say). If the linked premises don't
+# entail the goal (as with contradictory premises that don't mention it), every premise is kept.
+# @param table = a TruthTable over every symbol of the premises and goal, or None to only follow atoms
+def relevantPremises(premises, goal, table = None):
+    atomsOfPremise = [set(atomsOf([premise])) for premise in premises]
+    reached = set(atomsOf([goal]))
+    kept = set()
+    grown = True
+    while grown:
+        grown = False
+        for position, atoms in enumerate(atomsOfPremise):
+            if position not in kept and atoms & reached:
+                kept.add(position)
+                reached.update(atoms)
+                grown = True
+    relevant = [premises[position] for position in sorted(kept)]
+    if table is not None and not table.entails(relevant, goal):
+        return list(premises)
+    return relevant
@@ -0,0 +1,225 @@
+######################################################
+# File: server.py                                    #
+# Author: Dan McFalls (dmcfalls@stanford.edu)        #
+# Project: Fitch Proof Automation with State-Search  #
+# Final Project for CS221: Artificial Intelligence   #
+######################################################
+
+# A resident proof service: takes proof requests as JSON lines, proves them on a pool of worker
+# processes, and answers each with a JSON line as soon as it's done.
+#
+# Usage: python server.py [--port N] [--workers N] [--engine ucs|astar|fast|ida|plan|refute]
+#                         [--timeout SECONDS] [--max-nodes N] [--cache PATH] [--max-pending N]
+#                         [--costs PROFILE.json]
+#
+# Requests are read from standard input and answered on standard output, or, with --port, from any
+# number of connections to that port on localhost, each answered on its own connection. A request is
+# {"id": ..., "goal": ..., "premises": ...} as in batch.py, optionally with its own "engine",
+# "timeout" (seconds from when the request arrives, queueing included) and "maxNodes". The answer is
+# the batch.py record for it, its proof checked the same way, with status "cancelled" if it was
+# cancelled first. {"cancel": id} cancels a request of the same connection that hasn't been answered
+# yet. Closing a connection cancels every request on it, so a client should keep it open until it
+# has its answers.
+#
+# Starting the interpreter, parsing, and building the formulas of a problem only happen once per
+# process: the workers live as long as the server, so each keeps its interned formulas, its parsed
+# problems (fitch.parseProblem) and its proof cache (--cache, or one in memory per worker) warm from
+# one request to the next.
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import SocketServer
+import sys
+import threading
+import time
+
+import batch
+import checker
+import fitch
+import search
+
+# Cancellation flags of the requests in flight, one slot per request, inherited by every worker.
+_flags = None
+
+def initWorker(flags):
+    global _flags
+    _flags = flags
+
+# Proves a single request; runs in a worker process.
+# @param task = (request, options dict, cancellation slot, deadline as a time.time() value or None)
+def proveRequest(task):
+    request, options, slot, deadline = task
+    startTime = time.time()
+    try:
+        timeLimit = None if deadline is None else max(0, deadline - startTime)
+        maxNodes = request.get("maxNodes", options["maxNodes"])
+        result = fitch.findFitchProof(batch.formatPremises(request.get("premises")), request["goal"],
+                                      engine = request.get("engine", options["engine"]), maxNodes = maxNodes,
+                                      timeLimit = timeLimit, cache = batch.openCache(options["cache"]),
+                                      costs = options["costs"], cancel = search.CancellationToken(_flags, slot))
+        record = checker.verifyResult(result).toDict()
+    except Exception as error:
+        record = {"status": "error", "error": "%s: %s" % (type(error).__name__, error),
+                  "runtime": time.time() - startTime}
+    record["id"] = request.get("id")
+    return record
+
+# Dispatches requests to the worker pool and routes each answer back to the client that asked.
+class ProofServer(object):
+    # @param workers = worker processes (default: one per core)
+    # @param engine, maxNodes, timeLimit = defaults for requests that don't give their own
+    # @param cachePath = sqlite file of proofs the workers share (default: a cache in memory per worker)
+    # @param maxPending = most requests in flight at once; requests past that are answered with an error
+    # @param costs = the fitch.CostProfile to search with (None for fitch.DEFAULT_COSTS)
+    def __init__(self, workers = None, engine = "ucs", maxNodes = None, timeLimit = None, cachePath = None,
+                 maxPending = 1024, costs = None):
+        self.options = {"engine": engine, "maxNodes": maxNodes, "cache": cachePath or ":memory:", "costs": costs}
+        self.timeLimit = timeLimit
+        self.flags = multiprocessing.Array("b", maxPending, lock = False)
+        self.freeSlots = range(maxPending)
+        self.pending = {}                   # (client, id) -> slot of the request
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+        self.numbers = itertools.count(1)
+        self.pool = multiprocessing.Pool(workers, initWorker, (self.flags,))
+
+    # Handles one line from a client: starts proving a request, or cancels one. Answers go to
+    # reply(record), called from another thread when the request is done.
+    # @param client = any value identifying the connection, so that clients' ids don't clash
+    def handle(self, line, reply, client = None):
+        receivedTime = time.time()
+        request = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict) or ("goal" not in request and "cancel" not in request):
+                raise ValueError("a request needs a goal, or a request id to cancel")
+            if isinstance(request.get("id"), (list, dict)) or isinstance(request.get("cancel"), (list, dict)):
+                raise ValueError("request ids must be strings or numbers")
+            for name in ("timeout", "maxNodes"):
+                value = request.get(name)
+                if value is not None and (isinstance(value, bool) or not isinstance(value, (int, long, float))):
+                    raise ValueError("%s must be a number" % name)
+            engine = request.get("engine", "ucs")
+            if not isinstance(engine, basestring) or (engine != "ucs" and engine not in fitch.ENGINES):
+                raise ValueError("unknown search engine %s" % json.dumps(engine))
+        except ValueError as error:
+            record = {"status": "error", "error": "Bad request: %s" % error}
+            if isinstance(request, dict) and "id" in request and not isinstance(request["id"], (list, dict)):
+                record["id"] = request["id"]
+            reply(record)
+            return
+        if "cancel" in request:
+            self.cancel(client, request["cancel"], reply)
+            return
+
+        requestId = request.setdefault("id", next(self.numbers))
+        timeLimit = request.get("timeout", self.timeLimit)
+        deadline = None if timeLimit is None else receivedTime + timeLimit
+        with self.lock:
+            if (client, requestId) in self.pending:
+                reply({"id": requestId, "status": "error", "error": "Request %s is already in progress" % requestId})
+                return
+            if not self.freeSlots:
+                reply({"id": requestId, "status": "error", "error": "Too many requests in progress"})
+                return
+            slot = self.freeSlots.pop()
+            self.flags[slot] = 0
+            self.pending[(client, requestId)] = slot
+
+        def done(record):
+            with self.lock:
+                del self.pending[(client, requestId)]
+                self.freeSlots.append(slot)
+                self.idle.notify_all()
+            try:
+                reply(record)
+            except Exception:
+                # Runs on the pool's only result thread, which must survive a client that went away
+                pass
+        self.pool.apply_async(proveRequest, ((request, self.options, slot, deadline),), callback = done)
+
+    # Raises the cancellation flag of a request in flight; the request is then answered as cancelled.
+    def cancel(self, client, requestId, reply):
+        with self.lock:
+            slot = self.pending.get((client, requestId))
+            if slot is not None:
+                self.flags[slot] = 1
+                return
+        reply({"id": requestId, "status": "error", "error": "No request %s in progress" % requestId})
+
+    # Cancels every request of a client, e.g. when its connection closes.
+    def cancelAll(self, client):
+        with self.lock:
+            for (owner, _), slot in self.pending.items():
+                if owner == client:
+                    self.flags[slot] = 1
+
+    # Waits for every request in flight to be answered.
+    def drain(self):
+        with self.lock:
+            while self.pending:
+                self.idle.wait(1)
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+# Serves requests from a file-like input, answering on a file-like output, until the input ends.
+def serveLines(server, lines, output, client = None):
+    writeLock = threading.Lock()
+    def reply(record):
+        with writeLock:
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+    for line in iter(lines.readline, ""):
+        if line.strip():
+            server.handle(line, reply, client)
+
+# Serves one connection of a --port server.
+class ConnectionHandler(SocketServer.StreamRequestHandler):
+    def handle(self):
+        try:
+            serveLines(self.server.proofServer, self.rfile, self.wfile, self)
+        finally:
+            # Nobody is left to answer
+            self.server.proofServer.cancelAll(self)
+
+class ThreadingServer(SocketServer.ThreadingMixIn, SocketServer.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+def main():
+    parser = argparse.ArgumentParser(description = "Serve Fitch proof requests as JSON lines.")
+    parser.add_argument("--port", type = int, default = None,
+                        help = "serve connections to this port on localhost instead of standard input and output")
+    parser.add_argument("--workers", type = int, default = None, help = "worker processes (default: one per core)")
+    parser.add_argument("--engine", default = "ucs", choices = ["ucs"] + sorted(fitch.ENGINES.keys()),
+                        help = "engine for requests that don't name one")
+    parser.add_argument("--timeout", type = float, default = None,
+                        help = "seconds allowed for requests that don't give their own timeout")
+    parser.add_argument("--max-nodes", type = int, default = None,
+                        help = "states each search may expand, for requests that don't give their own maxNodes")
+    parser.add_argument("--cache", default = None, help = "sqlite file of proofs to reuse and extend")
+    parser.add_argument("--max-pending", type = int, default = 1024, help = "most requests in flight at once")
+    parser.add_argument("--costs", default = None, help = "JSON file of rule costs to search with, as tuning.py writes")
+    args = parser.parse_args()
+
+    costs = fitch.loadCostProfile(args.costs) if args.costs else None
+    server = ProofServer(args.workers, args.engine, args.max_nodes, args.timeout, args.cache, args.max_pending, costs)
+    try:
+        if args.port is None:
+            serveLines(server, sys.stdin, sys.stdout)
+            server.drain()
+        else:
+            listener = ThreadingServer(("127.0.0.1", args.port), ConnectionHandler)
+            listener.proofServer = server
+            listener.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+if __name__ == "__main__":
+    main()
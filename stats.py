@@ -0,0 +1,93 @@
+######################################################
+# File: stats.py                                     #
+# Author: Dan McFalls (dmcfalls@stanford.edu)        #
+# Project: Fitch Proof Automation with State-Search  #
+# Final Project for CS221: Artificial Intelligence   #
+######################################################
+
+import time
+
+# Collects statistics about a single search, for finding out why a proof is slow. Pass one to
+# search.AStarSearch (or fitch.solveFitchProof) and read it afterwards:
+#   * expanded / generated: states taken off / put on the frontier, in total and per rule
+#   * ruleTimes: seconds spent generating successors with each rule
+#   * peakFrontier: the largest the frontier got
+#   * costs: how many successors were generated at each step cost
+#
+# Recording costs a few dictionary updates per state, so it's fine to leave on.
+class SearchStats(object):
+    # @param label = function(state) naming the rule that produced a state, for the per-rule counts
+    # @param progress = function(stats) called every progressInterval expansions, e.g. to print a report
+    def __init__(self, label = None, progress = None, progressInterval = 10000):
+        self.label = label
+        self.progress = progress
+        self.progressInterval = progressInterval
+        self.expanded = 0
+        self.generated = 0
+        self.expandedByRule = {}
+        self.generatedByRule = {}
+        self.ruleTimes = {}
+        self.peakFrontier = 0
+        self.costs = {}
+        self.startTime = time.time()
+        self.lastLap = self.startTime
+
+    # Called by the search each time it expands a state.
+    def recordExpansion(self, state, frontierSize):
+        self.expanded += 1
+        if frontierSize > self.peakFrontier:
+            self.peakFrontier = frontierSize
+        if self.label is not None:
+            rule = self.label(state)
+            self.expandedByRule[rule] = self.expandedByRule.get(rule, 0) + 1
+        if self.progress is not None and self.expanded % self.progressInterval == 0:
+            self.progress(self)
+
+    # Called by the search each time it puts a successor on the frontier.
+    def recordSuccessor(self, state, cost):
+        self.generated += 1
+        self.costs[cost] = self.costs.get(cost, 0) + 1
+        if self.label is not None:
+            rule = self.label(state)
+            self.generatedByRule[rule] = self.generatedByRule.get(rule, 0) + 1
+
+    # Timing of successor generation: call startRules() before generating a state's successors, then
+    # endRule(rule) after each rule's block; the time since the previous call is charged to the rule.
+    def startRules(self):
+        self.lastLap = time.time()
+
+    def endRule(self, rule):
+        now = time.time()
+        self.ruleTimes[rule] = self.ruleTimes.get(rule, 0.0) + now - self.lastLap
+        self.lastLap = now
+
+    def elapsed(self):
+        return time.time() - self.startTime
+
+    # Returns a JSON-serializable summary.
+    def toDict(self):
+        return {
+            "expanded": self.expanded,
+            "generated": self.generated,
+            "expandedByRule": self.expandedByRule,
+            "generatedByRule": self.generatedByRule,
+            "ruleTimes": self.ruleTimes,
+            "peakFrontier": self.peakFrontier,
+            "costs": dict((str(cost), count) for cost, count in self.costs.items()),
+            "elapsed": self.elapsed(),
+        }
+
+    # Returns a printable table of the statistics, one rule per line, busiest rules first.
+    def report(self):
+        lines = ["%d expanded, %d generated, peak frontier %d, %.2fs" %
+                 (self.expanded, self.generated, self.peakFrontier, self.elapsed())]
+        rules = set(self.generatedByRule) | set(self.expandedByRule) | set(self.ruleTimes)
+        rules = sorted(rules, key = lambda rule: -self.generatedByRule.get(rule, 0))
+        if rules:
+            lines.append("%-8s %10s %10s %9s" % ("rule", "generated", "expanded", "seconds"))
+        for rule in rules:
+            lines.append("%-8s %10d %10d %9.3f" % (rule, self.generatedByRule.get(rule, 0),
+                                                   self.expandedByRule.get(rule, 0), self.ruleTimes.get(rule, 0.0)))
+        if self.costs:
+            lines.append("step costs: " + ", ".join("%s x%d" % (cost, self.costs[cost]) for cost in sorted(self.costs)))
+        return "\n".join(lines)
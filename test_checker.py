@@ -0,0 +1,106 @@
+######################################################
+# File: test_checker.py                              #
+# Author: Dan McFalls (dmcfalls@stanford.edu)        #
+# Project: Fitch Proof Automation with State-Search  #
+# Final Project for CS221: Artificial Intelligence   #
+######################################################
+
+# Tests for checker.py: proofs that follow the rules pass, and proofs that break one are rejected at
+# the line that breaks it. Run with: python -m unittest discover
+
+import unittest
+
+import checker
+import fitch
+import formula
+
+p = formula.parse
+
+# Returns the lines of a proof written as (sentence text, justification, depth) tuples.
+def proof(*lines):
+    return [(p(text), justification, depth) for text, justification, depth in lines]
+
+class ValidProofTest(unittest.TestCase):
+    def assertValid(self, premises, goal, lines):
+        checker.checkProof([p(premise) for premise in premises], p(goal), lines)
+
+    def testImplicationElimination(self):
+        self.assertValid(["p -> q", "p"], "q", proof(("q", "IE", 0)))
+
+    def testImplicationIntroduction(self):
+        self.assertValid(["q"], "p -> q", proof(("p", "A", 1), ("q", "R", 1), ("p -> q", "II", 0)))
+
+    def testNegationIntroductionFromOneSubproof(self):
+        self.assertValid(["p -> q", "~q"], "~p",
+                         proof(("p", "A", 1), ("q", "IE", 1), ("~q", "R", 1),
+                               ("p -> q", "II", 0), ("p -> ~q", "II", 0), ("~p", "NI", 0)))
+
+    def testFlatConjunctionsAndDisjunctions(self):
+        self.assertValid(["p && q", "r"], "p && q && r", proof(("p && q && r", "AI", 0)))
+        self.assertValid(["q"], "p || q || r", proof(("p || q || r", "OI", 0)))
+
+    def testOrElimination(self):
+        self.assertValid(["p || ~p", "p -> q", "~p -> q"], "q", proof(("q", "OE", 0)))
+
+    def testBiconditionals(self):
+        self.assertValid(["p <-> q", "p"], "q", proof(("p -> q", "BE", 0), ("q", "IE", 0)))
+        self.assertValid(["p -> q", "q -> p"], "p <-> q", proof(("p <-> q", "BI", 0)))
+
+    def testPremiseLinesFirst(self):
+        self.assertValid(["p"], "p", proof(("p", "Premise", 0), ("p", "R", 0)))
+
+    # Every engine's proofs of a few exercises pass
+    def testProofsFromEveryEngine(self):
+        problems = [("* p => q * q => r", "p => r"), ("* p => q * NOT q", "NOT p"),
+                    ("* p OR q * p => r * q => r", "r")]
+        for engine in ["ucs"] + sorted(fitch.ENGINES.keys()):
+            for premises, goal in problems:
+                result = fitch.findFitchProof(premises, goal, engine, maxNodes = 20000)
+                self.assertEqual(result.status, "proved", (engine, premises, goal))
+                checker.checkProof(result.premises, result.goal, result.lines)
+
+class InvalidProofTest(unittest.TestCase):
+    # Asserts that checkProof rejects the proof at the given line (None for the proof as a whole).
+    def assertInvalid(self, premises, goal, lines, lineNumber):
+        premises = [p(premise) for premise in premises]
+        with self.assertRaises(checker.InvalidProof) as raised:
+            checker.checkProof(premises, p(goal), lines)
+        self.assertEqual(raised.exception.lineNumber, lineNumber)
+        self.assertFalse(checker.isValidProof(premises, p(goal), lines))
+
+    def testWrongRule(self):
+        self.assertInvalid(["p -> q", "p"], "q", proof(("q", "AE", 0)), 1)
+
+    def testSentenceNotInScope(self):
+        self.assertInvalid(["p"], "q", proof(("q", "R", 0)), 1)
+
+    def testLineOfClosedSubproof(self):
+        self.assertInvalid([], "q", proof(("q", "A", 1), ("q -> q", "II", 0), ("q", "R", 0)), 3)
+
+    def testLineAfterGoal(self):
+        self.assertInvalid(["p"], "q -> p",
+                           proof(("q", "A", 1), ("p", "R", 1), ("q -> p", "II", 0), ("q", "R", 0)), 4)
+
+    def testSkippedDepth(self):
+        self.assertInvalid([], "q -> q", proof(("q", "A", 2)), 1)
+
+    def testPremiseAfterOtherLines(self):
+        self.assertInvalid(["p"], "p", proof(("p", "R", 0), ("p", "Premise", 0)), 2)
+
+    def testUnknownJustification(self):
+        self.assertInvalid(["p"], "p", proof(("p", "XX", 0)), 1)
+
+    def testMissingGoal(self):
+        self.assertInvalid(["p", "q"], "q", proof(("p", "R", 0)), None)
+
+    def testNegationIntroductionNeedsBothImplications(self):
+        self.assertInvalid(["p -> q"], "~p", proof(("~p", "NI", 0)), 1)
+
+    def testVerifyResultRejectsBadProof(self):
+        result = fitch.ProofResult("proved", [p("p")], p("q"), proof(("q", "R", 0)), ["Reiteration: q"])
+        checker.verifyResult(result)
+        self.assertEqual(result.status, "rejected")
+        self.assertTrue(result.error.startswith("Invalid proof: line 1"))
+
+if __name__ == "__main__":
+    unittest.main()
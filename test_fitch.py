@@ -0,0 +1,75 @@
+######################################################
+# File: test_fitch.py                                #
+# Author: Dan McFalls (dmcfalls@stanford.edu)        #
+# Project: Fitch Proof Automation with State-Search  #
+# Final Project for CS221: Artificial Intelligence   #
+######################################################
+
+# Tests for parsing problems (fitch.parseProblem) and for the premise pruning findFitchProof does
+# before searching (semantics.relevantPremises). Run with: python -m unittest discover
+
+import unittest
+
+import fitch
+import formula
+import semantics
+
+p = formula.parse
+
+class ParseLimitTest(unittest.TestCase):
+    def testTooManyTokens(self):
+        premises = " * p" * (fitch.MAX_PROBLEM_TOKENS // 2 + 1)
+        with self.assertRaises(ValueError):
+            fitch.parseProblem(premises, "p")
+
+    def testTooDeeplyNested(self):
+        goal = "(p -> " * (fitch.MAX_NESTING_DEPTH + 1) + "q" + ")" * (fitch.MAX_NESTING_DEPTH + 1)
+        with self.assertRaises(ValueError):
+            fitch.parseProblem("* q", goal)
+
+    def testNestedToTheLimit(self):
+        goal = "(p -> " * fitch.MAX_NESTING_DEPTH + "q" + ")" * fitch.MAX_NESTING_DEPTH
+        parsedGoal = fitch.parseProblem("* q", goal)[1]
+        self.assertTrue(parsedGoal.isImplication())
+
+    # Chains of one connective are flat, so however long they are they count as one level
+    def testLongChainIsOneLevel(self):
+        goal = " && ".join(["p%d" % i for i in range(fitch.MAX_NESTING_DEPTH * 2)])
+        parsedGoal = fitch.parseProblem("* p0", goal)[1]
+        self.assertEqual(len(parsedGoal.children), fitch.MAX_NESTING_DEPTH * 2)
+
+    def testFindFitchProofRaises(self):
+        goal = "~" * (fitch.MAX_NESTING_DEPTH + 1) + "p"
+        with self.assertRaises(ValueError):
+            fitch.findFitchProof("* p", goal)
+
+class PruningTest(unittest.TestCase):
+    # p || ~p isn't needed for q to follow, but it is for the proof: pruning it would leave the
+    # search with nothing to split into cases on
+    def testKeepsPremisesTheProofNeeds(self):
+        premises = [p("p || ~p"), p("p -> q"), p("~p -> q")]
+        table = semantics.checkEntailment(premises, p("q")).table
+        self.assertEqual(semantics.relevantPremises(premises, p("q"), table), premises)
+        for engine in ["ucs", "astar"]:
+            result = fitch.findFitchProof("* p OR NOT p * p => q * NOT p => q", "q", engine, maxNodes = 20000)
+            self.assertEqual(result.status, "proved", engine)
+            self.assertEqual(len(result.lines), 1, engine)
+
+    def testDropsDisconnectedPremises(self):
+        premises = [p("p -> q"), p("r -> s"), p("p"), p("s")]
+        self.assertEqual(semantics.relevantPremises(premises, p("q")), [p("p -> q"), p("p")])
+
+    # Premises linked to the goal only through another premise are kept
+    def testFollowsLinksThroughPremises(self):
+        premises = [p("r -> q"), p("p -> r"), p("p"), p("t")]
+        self.assertEqual(semantics.relevantPremises(premises, p("q")), premises[:3])
+
+    # Contradictory premises entail the goal without mentioning it, so none are dropped
+    def testKeepsEveryPremiseIfTheLinkedOnesDontEntailTheGoal(self):
+        premises = [p("r"), p("~r")]
+        table = semantics.checkEntailment(premises, p("q")).table
+        self.assertEqual(semantics.relevantPremises(premises, p("q"), table), premises)
+        self.assertEqual(fitch.findFitchProof("* r * NOT r", "q", "astar", maxNodes = 20000).status, "proved")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,163 @@
+######################################################
+# File: tuning.py                                    #
+# Author: Dan McFalls (dmcfalls@stanford.edu)        #
+# Project: Fitch Proof Automation with State-Search  #
+# Final Project for CS221: Artificial Intelligence   #
+######################################################
+
+# Tunes the rule costs of the search (fitch.CostProfile) to a corpus of problems.
+#
+# Usage: python tuning.py [-o profile.json] [--corpus problems.jsonl] [--engine ucs|astar|fast|ida|plan]
+#                         [--max-nodes N] [--timeout SECONDS] [--workers N] [--rounds N] [--start profile.json]
+#
+# A profile is scored by the total number of states the search expands over the corpus, each problem
+# under the same node budget; a problem the profile doesn't prove counts as the whole budget. Starting
+# from the default costs (or --start), the tuner tries every profile one step away, multiplying or
+# dividing one cost by the step, and moves to the best one if it's better. When no step improves the
+# score, the step shrinks to its square root, until it's too small to matter. Each round's profiles
+# run at once, every (profile, problem) pair in its own task on a pool of processes.
+#
+# The corpus is the exercises from main.py (benchmark.PROBLEMS, without the stretch problems), or a
+# JSON-lines file of problems as batch.py reads them. The best profile is written as JSON, which
+# fitch.loadCostProfile reads (so solveFitchProof(..., costs = "profile.json") and batch.py and
+# server.py --costs use it).
+
+import argparse
+import json
+import math
+import multiprocessing
+import sys
+
+import batch
+import benchmark
+import fitch
+
+# The costs tuned, each with the range it's kept in. Every rule but Assumption stays at a cost of at
+# least 1, so the A* heuristics stay admissible (see fitch.CostProfile).
+PARAMETERS = [
+    ("assumptionGrowth", 1, 4),
+    ("guidedAssumptionBias", 0.05, 1),
+    ("symbolAssumptionBias", 1, 10),
+    ("conjunctionCost", 1, 20),
+    ("repeatedConjunctionCost", 1, 50),
+    ("disjunctionCostPerCharacter", 0.05, 5),
+]
+
+# Returns the corpus as a list of (name, premises, goal) problems: the problems of a JSON-lines file
+# (see batch.readProblems), or the exercises benchmark.py runs if path is None.
+def readCorpus(path = None):
+    if path is None:
+        return [(name, premises, goal) for name, premises, goal, stretch in benchmark.PROBLEMS if not stretch]
+    return [(str(problem["id"]), batch.formatPremises(problem.get("premises")), problem["goal"])
+            for problem in batch.readProblems(path)]
+
+# Runs one problem with one profile; runs in a worker process.
+# @param task = (profile number, dict of costs, problem, options dict)
+# @return (profile number, problem name, score), where the score is the states expanded, or the node
+#   budget if the problem wasn't proved
+def runCandidate(task):
+    number, values, (name, premises, goal), options = task
+    result = fitch.findFitchProof(premises, goal, options["engine"], maxNodes = options["maxNodes"],
+                                  timeLimit = options["timeLimit"], costs = fitch.CostProfile(**values))
+    if result.status == "proved":
+        return number, name, result.nodes
+    return number, name, options["maxNodes"]
+
+# Returns the key a profile's scores are remembered under.
+def profileKey(values):
+    return tuple(sorted(values.items()))
+
+# Returns the profiles one step away from a profile: each cost multiplied or divided by the step,
+# within its range (and rounded to 3 significant digits, so that the steps don't drift).
+def neighbors(values, step):
+    profiles = []
+    for name, lowest, highest in PARAMETERS:
+        for factor in (step, 1.0 / step):
+            value = min(highest, max(lowest, float("%.3g" % (values[name] * factor))))
+            if value != values[name]:
+                profile = dict(values)
+                profile[name] = value
+                profiles.append(profile)
+    return profiles
+
+# Tunes a CostProfile to a corpus of problems, and returns (best profile, its score, the score of the
+# start profile). Scores are the total states expanded over the corpus (see runCandidate).
+# @param corpus = list of (name, premises, goal) problems, as readCorpus returns
+# @param engine = an engine that searches with the rule costs ("ucs", "astar", "fast", "ida" or "plan")
+# @param maxNodes, timeLimit = budgets for each problem; a problem out of time counts as out of nodes
+# @param workers = processes to run candidates on (default: one per core)
+# @param rounds = most rounds of trying the neighbors of the best profile so far
+# @param start = the CostProfile to start from (fitch.DEFAULT_COSTS if None)
+# @param report = function(round number, best score, step) called after each round
+def tuneCosts(corpus, engine = "astar", maxNodes = 20000, timeLimit = 60, workers = None, rounds = 20, start = None,
+              report = None):
+    if engine == "refute":
+        raise ValueError("Search engine refute doesn't use rule costs")
+    options = {"engine": engine, "maxNodes": maxNodes, "timeLimit": timeLimit}
+    scores = {}                     # profile key -> score
+
+    # Scores every profile not scored yet, all at once
+    def evaluate(profiles):
+        profiles = [profile for profile in profiles if profileKey(profile) not in scores]
+        totals = [0] * len(profiles)
+        tasks = [(number, profile, problem, options) for number, profile in enumerate(profiles) for problem in corpus]
+        for number, _, score in pool.imap_unordered(runCandidate, tasks):
+            totals[number] += score
+        for profile, total in zip(profiles, totals):
+            scores[profileKey(profile)] = total
+
+    pool = multiprocessing.Pool(workers)
+    try:
+        best = (start or fitch.DEFAULT_COSTS).toDict()
+        evaluate([best])
+        startScore = bestScore = scores[profileKey(best)]
+        step = 2.0
+        for roundNumber in range(1, rounds + 1):
+            candidates = neighbors(best, step)
+            evaluate(candidates)
+            candidate = min(candidates, key = lambda profile: scores[profileKey(profile)]) if candidates else None
+            if candidate is not None and scores[profileKey(candidate)] < bestScore:
+                best, bestScore = candidate, scores[profileKey(candidate)]
+            else:
+                step = math.sqrt(step)
+            if report is not None:
+                report(roundNumber, bestScore, step)
+            if step < 1.05:
+                break
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    return fitch.CostProfile(**best), bestScore, startScore
+
+def main():
+    parser = argparse.ArgumentParser(description = "Tune the search's rule costs to a corpus of problems.")
+    parser.add_argument("-o", "--output", help = "file to save the best profile to, as JSON (default: standard output)")
+    parser.add_argument("--corpus", help = "JSON-lines file of problems, as batch.py reads (default: the main.py exercises)")
+    parser.add_argument("--engine", default = "astar", choices = ["ucs", "astar", "fast", "ida", "plan"])
+    parser.add_argument("--max-nodes", type = int, default = 20000, help = "states each search may expand")
+    parser.add_argument("--timeout", type = float, default = 60, help = "wall-clock seconds allowed per problem")
+    parser.add_argument("--workers", type = int, default = None, help = "worker processes (default: one per core)")
+    parser.add_argument("--rounds", type = int, default = 20, help = "most rounds of candidate profiles")
+    parser.add_argument("--start", help = "profile to start from, as JSON (default: the built-in costs)")
+    args = parser.parse_args()
+
+    corpus = readCorpus(args.corpus)
+    start = fitch.loadCostProfile(args.start) if args.start else None
+    def report(roundNumber, score, step):
+        sys.stderr.write("Round %d: %d nodes (step x%.3g)\n" % (roundNumber, score, step))
+    costs, score, startScore = tuneCosts(corpus, args.engine, args.max_nodes, args.timeout, args.workers, args.rounds,
+                                         start, report)
+    sys.stderr.write("%d nodes over %d problems, from %d with the starting costs\n" % (score, len(corpus), startScore))
+
+    profile = json.dumps(costs.toDict(), indent = 2, sort_keys = True)
+    if args.output:
+        with open(args.output, "w") as outputFile:
+            outputFile.write(profile + "\n")
+    else:
+        print profile
+
+if __name__ == "__main__":
+    main()